@@ -0,0 +1,49 @@
+"""Compara calcular_años fila a fila (apply) contra calcular_años_vector.
+
+Uso: python benchmarks/bench_antiguedad.py [filas ...]   (por defecto 10000 100000 1000000)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dotacion import calcular_años, calcular_años_vector
+
+
+def generar_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Fecha': pd.Timestamp('1990-01-01') + pd.to_timedelta(rng.integers(0, 12000, n), unit='D'),
+        'Fecha nac.': pd.Timestamp('1955-01-01') + pd.to_timedelta(rng.integers(0, 18000, n), unit='D'),
+        'Desde': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 700, n), unit='D'),
+    })
+    df.loc[::50, 'Fecha nac.'] = pd.NaT
+    return df
+
+
+def medir(fn):
+    t0 = time.perf_counter()
+    resultado = fn()
+    return time.perf_counter() - t0, resultado
+
+
+def main(tamaños):
+    hoy = pd.Timestamp.now()
+    print(f"{'filas':>10} {'referencia':>10} {'apply (s)':>10} {'vector (s)':>11} {'mejora':>8}")
+    for n in tamaños:
+        df = generar_frame(n)
+        for nombre, ref in (('escalar', hoy), ('por fila', df['Desde'])):
+            if nombre == 'escalar':
+                t_apply, antes = medir(lambda: df.apply(lambda r: calcular_años(r['Fecha nac.'], hoy), axis=1))
+            else:
+                t_apply, antes = medir(lambda: df.apply(lambda r: calcular_años(r['Fecha nac.'], r['Desde']), axis=1))
+            t_vec, despues = medir(lambda: calcular_años_vector(df['Fecha nac.'], ref))
+            assert np.array_equal(antes.to_numpy(dtype=float), despues.to_numpy()), "resultados distintos"
+            print(f"{n:>10} {nombre:>10} {t_apply:>10.3f} {t_vec:>11.4f} {t_apply / t_vec:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
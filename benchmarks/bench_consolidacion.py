@@ -0,0 +1,47 @@
+"""Tiempo de cargar un export por Línea (7 libros) según la cantidad de procesos que los leen en paralelo.
+
+Uso: python benchmarks/bench_consolidacion.py [filas] [procesos ...]   (por defecto 40000 filas; 1, 2, 4 y núcleos)
+
+Los libros se generan una vez en benchmarks/.lineas_<filas>/. También carga el mismo contenido como un
+solo Excel para comparar, y verifica que ambos den la misma dotación.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import dotacion as d
+from libro_sintetico import escribir_libro, escribir_por_linea, generar_hojas
+
+d.activar_copy_on_write()
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+
+
+def cargar(archivo, procesos=None):
+    """(segundos, libro) de una carga sin caché."""
+    d._CACHE_LIBROS = d.CacheLRU(d.MAX_LIBROS_EN_CACHE)
+    t0 = time.perf_counter()
+    libro = d.cargar_libro(archivo, procesos)
+    return time.perf_counter() - t0, libro
+
+
+def main(filas='40000', *procesos):
+    n = int(filas)
+    carpeta, unico = os.path.join(DIR_BENCH, f'.lineas_{n}'), os.path.join(DIR_BENCH, f'.libro_{n}.xlsx')
+    if not os.path.isdir(carpeta) or not os.path.exists(unico):
+        hojas = generar_hojas(n)
+        escribir_por_linea(hojas, carpeta)
+        escribir_libro(hojas, unico)
+    procesos = [int(p) for p in procesos] or sorted({1, 2, 4, os.cpu_count() or 1})
+
+    segundos, referencia = cargar(unico)
+    print(f"{'un solo Excel':<22} {segundos:>8.2f} s   {len(referencia.base)} filas")
+    for p in procesos:
+        segundos, libro = cargar(carpeta, p)
+        igual = libro.cubo.activos['n'].sum() == referencia.cubo.activos['n'].sum() and len(libro.base) == len(referencia.base)
+        print(f"{f'7 libros, {p} procesos':<22} {segundos:>8.2f} s   {len(libro.base)} filas{'' if igual else '  (¡distinto al Excel único!)'}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
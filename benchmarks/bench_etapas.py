@@ -0,0 +1,158 @@
+"""Mide tiempo y memoria pico de cada etapa del pipeline sobre libros sintéticos de distintos tamaños.
+
+Uso:
+    python benchmarks/bench_etapas.py [filas ...] [--repeticiones N] [--salida resultados.json]
+    python benchmarks/bench_etapas.py 10000 100000 --comparar benchmarks/resultados/abc1234.json
+
+Por defecto mide 10000 y 100000 filas de BaseQuery y escribe benchmarks/resultados/<commit>.json. El
+tiempo es el mejor de N repeticiones; la memoria pico (tracemalloc, incluye los arrays de numpy) se mide en
+una corrida aparte para no inflar los tiempos. Con --comparar se listan las etapas cuyo tiempo o memoria
+empeoró más que --umbral respecto a otra corrida, y el script termina con código 1 si hay alguna.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIR_BENCH, '..'))
+import dotacion as d
+from libro_sintetico import HOY, libro_en_memoria
+
+d.activar_copy_on_write()
+
+INICIO_ANUAL, FIN_ANUAL = HOY.replace(month=1, day=1), HOY.replace(month=12, day=31)
+
+
+def preparar(contenido):
+    """Entradas de cada etapa, calculadas una vez fuera de la medición."""
+    hojas = d.leer_libro(contenido)
+    base, activos, co = hojas['BaseQuery'], hojas['Activos'], hojas['CO']
+    diferencias = d.comparar_fotos(base, activos, co)
+    eventos = d.indexar_eventos(base, diferencias.co)
+    libro = d.LibroDotacion('bench', base, activos, co, diferencias, eventos, d.construir_cubo(base, eventos))
+    altas, bajas, co_f = d.filtrar_novedades_por_fecha(eventos, INICIO_ANUAL, FIN_ANUAL)
+    activos_hoy = d.agregar_antiguedad_edad(base[base['Status ocupación'] == 'Activo'], HOY)
+    datos_anual = d.calcular_reporte_periodo(libro, 'Anual', INICIO_ANUAL, FIN_ANUAL)
+    return dict(contenido=contenido, base=base, activos=activos, co=co, eventos=eventos, libro=libro,
+                altas=altas, bajas=bajas, co_f=co_f, activos_hoy=activos_hoy, datos_anual=datos_anual)
+
+
+ETAPAS = {
+    'procesar_archivo_base': lambda e: [d.procesar_archivo_base(io.BytesIO(e['contenido']), h) for h in d.HOJAS_LIBRO],
+    'leer_libro': lambda e: d.leer_libro(e['contenido']),
+    'comparar_fotos': lambda e: d.comparar_fotos(e['base'], e['activos'], e['co']),
+    'procesar_recategorizaciones': lambda e: d.procesar_recategorizaciones(e['base'], e['activos']),
+    'indexar_eventos': lambda e: d.indexar_eventos(e['base'], e['libro'].diferencias.co),
+    'construir_cubo': lambda e: d.construir_cubo(e['base'], e['eventos']),
+    'procesar_metricas_novedades': lambda e: d.procesar_metricas_novedades(e['altas'], e['bajas'], e['co_f'], FIN_ANUAL),
+    'generar_resumen_completo': lambda e: d.generar_resumen_completo(e['activos_hoy']),
+    'calcular_reporte_diario': lambda e: d.calcular_reporte_diario(e['libro'], HOY),
+    'calcular_reporte_periodo': lambda e: d.calcular_reporte_periodo(e['libro'], 'Anual', INICIO_ANUAL, FIN_ANUAL),
+    # Mismo rango con 120 y ~3650 períodos: el tiempo no debería crecer con la cantidad de períodos
+    'calcular_tendencia_mes': lambda e: d.calcular_tendencia(e['libro'], HOY - pd.DateOffset(years=10), HOY, 'Mes'),
+    'calcular_tendencia_dia': lambda e: d.calcular_tendencia(e['libro'], HOY - pd.DateOffset(years=10), HOY, 'Día'),
+    'crear_pdf_reporte': lambda e: d.crear_pdf_reporte(d.titulo_reporte('Anual'), f"{INICIO_ANUAL:%d/%m/%Y} - {FIN_ANUAL:%d/%m/%Y}", **e['datos_anual']),
+    'escribir_pdf_reporte': lambda e: escribir_pdf_descartado(e['datos_anual']),
+}
+
+
+def escribir_pdf_descartado(datos):
+    """PDF anual escrito a disco (os.devnull): lo que hacen la caché de la app y el CLI."""
+    with open(os.devnull, 'wb') as f:
+        d.escribir_pdf_reporte(f, d.titulo_reporte('Anual'), f"{INICIO_ANUAL:%d/%m/%Y} - {FIN_ANUAL:%d/%m/%Y}", **datos)
+
+
+def medir(fn, repeticiones):
+    """(mejor tiempo en s, memoria pico en MB) de fn()."""
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(tiempos), pico / 2**20
+
+
+def version_repo():
+    """Commit corto de HEAD, con '+cambios' si hay modificaciones sin commitear."""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=DIR_BENCH, capture_output=True, text=True, check=True).stdout.strip()
+    try:
+        commit = git('rev-parse', '--short', 'HEAD')
+        return commit + ('+cambios' if git('status', '--porcelain', '--untracked-files=no') else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'sin-git'
+
+
+def comparar(resultados, anterior, umbral):
+    """Filas (filas, etapa, métrica, antes, ahora) que empeoraron más de umbral veces."""
+    previos = {(r['filas'], r['etapa']): r for r in anterior['resultados']}
+    peores = []
+    for r in resultados:
+        p = previos.get((r['filas'], r['etapa']))
+        if p is None: continue
+        for metrica in ('segundos', 'pico_mb'):
+            # Debajo de 1 ms o 1 MB el ruido domina
+            if r[metrica] > p[metrica] * umbral and r[metrica] - p[metrica] > (0.001 if metrica == 'segundos' else 1):
+                peores.append((r['filas'], r['etapa'], metrica, p[metrica], r[metrica]))
+    return peores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark por etapa del pipeline de dotación.")
+    parser.add_argument('filas', nargs='*', type=int, default=[10_000, 100_000], help="filas de BaseQuery a medir")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument('--salida', help="JSON de resultados (default: benchmarks/resultados/<commit>.json)")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior contra el que comparar")
+    parser.add_argument('--umbral', type=float, default=1.25, help="factor de empeoramiento que se reporta (default 1.25)")
+    args = parser.parse_args(argv)
+
+    version = version_repo()
+    resultados = []
+    print(f"{'filas':>9} {'etapa':<28} {'tiempo (s)':>11} {'pico (MB)':>10}")
+    for n in args.filas:
+        t0 = time.perf_counter()
+        entradas = preparar(libro_en_memoria(n))
+        print(f"{n:>9} {'(generar y preparar)':<28} {time.perf_counter() - t0:>11.2f}")
+        for etapa in args.etapas:
+            segundos, pico = medir(lambda: ETAPAS[etapa](entradas), args.repeticiones)
+            resultados.append({'filas': n, 'etapa': etapa, 'segundos': round(segundos, 5), 'pico_mb': round(pico, 2)})
+            print(f"{n:>9} {etapa:<28} {segundos:>11.4f} {pico:>10.1f}")
+        del entradas
+
+    salida = args.salida or os.path.join(DIR_BENCH, 'resultados', f'{version}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': version, 'fecha': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'pandas': pd.__version__, 'plataforma': platform.platform(),
+            'repeticiones': args.repeticiones, 'resultados': resultados,
+        }, f, ensure_ascii=False, indent=1)
+    print(f"Resultados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f: anterior = json.load(f)
+        peores = comparar(resultados, anterior, args.umbral)
+        print(f"Comparado con {anterior['version']}: {len(peores)} empeoramientos de más de {args.umbral}x")
+        for n, etapa, metrica, antes, ahora in peores:
+            factor = f"{ahora / antes:.2f}x" if antes else "antes ~0"
+            print(f"  {n:>9} {etapa:<28} {metrica:<9} {antes:>10.4f} -> {ahora:>10.4f} ({factor})")
+        if peores: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
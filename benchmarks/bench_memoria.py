@@ -0,0 +1,44 @@
+"""Memoria que retiene un libro cargado (lo que queda en la caché por cada archivo subido).
+
+Uso: python benchmarks/bench_memoria.py [filas | archivo.xlsx]   (por defecto 40000 filas sintéticas)
+
+Muestra la memoria retenida después de cargar_libro según tracemalloc, el tamaño de cada hoja y el de cada
+columna de BaseQuery con su tipo.
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dotacion import activar_copy_on_write, cargar_libro
+from libro_sintetico import escribir_libro, generar_hojas
+
+activar_copy_on_write()
+
+
+def main(origen='40000'):
+    if origen.isdigit():
+        ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'.libro_{origen}.xlsx')
+        if not os.path.exists(ruta): escribir_libro(generar_hojas(int(origen)), ruta)
+    else:
+        ruta = origen
+
+    gc.collect()
+    tracemalloc.start()
+    libro = cargar_libro(ruta)
+    gc.collect()
+    retenido, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{ruta}: {len(libro.base)} filas en BaseQuery")
+    print(f"  retenido: {retenido / 2**20:8.1f} MB   pico al cargar: {pico / 2**20:8.1f} MB")
+    for nombre in ('base', 'activos', 'co'):
+        print(f"  {nombre:<8} {getattr(libro, nombre).memory_usage(deep=True).sum() / 2**20:8.1f} MB")
+    uso = libro.base.memory_usage(deep=True, index=False)
+    for col, dtype in libro.base.dtypes.items():
+        print(f"    {col:<18} {str(dtype)[:24]:<24} {uso[col] / 2**20:6.2f} MB")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
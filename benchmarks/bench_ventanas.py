@@ -0,0 +1,72 @@
+"""Compara el filtrado por período con máscaras (implementación anterior) contra el índice de eventos.
+
+Uso: python benchmarks/bench_ventanas.py [filas] [años]   (por defecto 200000 filas, 10 años)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dotacion import indexar_eventos, filtrar_novedades_por_fecha
+
+
+def filtrar_con_mascaras(df_base, df_co, fecha_inicio, fecha_fin):
+    """Implementación anterior: copia, máscara booleana sobre toda la base y orden del resultado."""
+    df = df_base.copy()
+    altas = df[(df['Fecha'] >= fecha_inicio) & (df['Fecha'] <= fecha_fin)].copy()
+    df_bajas_p = df[df['Status ocupación'] == 'Dado de baja'].copy()
+    df_bajas_p['f_corregida'] = df_bajas_p['Desde'] - pd.Timedelta(days=1)
+    bajas = df_bajas_p[(df_bajas_p['f_corregida'] >= fecha_inicio) & (df_bajas_p['f_corregida'] <= fecha_fin)].copy()
+    bajas['Desde'] = bajas['f_corregida']
+    co = df_co[(df_co['Desde'] >= fecha_inicio) & (df_co['Desde'] <= fecha_fin)].copy()
+    return altas.sort_values(by='Fecha'), bajas.sort_values(by='Desde'), co.sort_values(by='Desde')
+
+
+def generar_base(n, años, seed=0):
+    rng = np.random.default_rng(seed)
+    inicio = pd.Timestamp('2025-01-01') - pd.DateOffset(years=años)
+    dias = años * 365
+    df_base = pd.DataFrame({
+        'Nº pers.': np.arange(n),
+        'Status ocupación': np.where(rng.random(n) < 0.7, 'Activo', 'Dado de baja'),
+        'Fecha': inicio + pd.to_timedelta(rng.integers(0, dias, n), unit='D'),
+        'Desde': inicio + pd.to_timedelta(rng.integers(0, dias, n), unit='D'),
+        'Línea': rng.choice(['ROCA', 'MITRE', 'SARMIENTO'], n),
+    })
+    df_co = df_base.sample(frac=0.02, random_state=seed)[['Nº pers.', 'Desde']]
+    return df_base, df_co, inicio
+
+
+def main(n=200_000, años=10):
+    df_base, df_co, inicio = generar_base(n, años)
+    semanas = pd.date_range(inicio, periods=años * 52, freq='7D')
+    ventanas = [(s, s + pd.Timedelta(days=6)) for s in semanas]
+    ventanas += [(m, m + pd.offsets.MonthEnd(0)) for m in pd.date_range(inicio, periods=años * 12, freq='MS')]
+
+    t0 = time.perf_counter()
+    eventos = indexar_eventos(df_base, df_co)
+    t_indice = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    antes = [filtrar_con_mascaras(df_base, df_co, s, e) for s, e in ventanas]
+    t_mascaras = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    despues = [filtrar_novedades_por_fecha(eventos, s, e) for s, e in ventanas]
+    t_ventanas = time.perf_counter() - t0
+
+    for viejo, nuevo in zip(antes, despues):
+        for (df_v, df_n, col) in zip(viejo, nuevo, ['Fecha', 'Desde', 'Desde']):
+            assert len(df_v) == len(df_n) and (df_v[col].to_numpy() == df_n[col].to_numpy()).all(), "ventanas distintas"
+
+    print(f"{n} filas, {años} años, {len(ventanas)} ventanas")
+    print(f"  máscaras:            {t_mascaras:8.3f} s  ({t_mascaras / len(ventanas) * 1000:.2f} ms por ventana)")
+    print(f"  índice (construir):  {t_indice:8.3f} s")
+    print(f"  índice (ventanas):   {t_ventanas:8.3f} s  ({t_ventanas / len(ventanas) * 1000:.3f} ms por ventana)")
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,111 @@
+"""Genera libros de dotación sintéticos con la forma del Excel real (BaseQuery, Activos y CO).
+
+Uso: python benchmarks/libro_sintetico.py filas salida.xlsx [semilla]
+
+- BaseQuery: activos y dados de baja con las columnas originales (Gr.prof., División de personal,
+  Motivo de la medida...), las 7 Líneas y las 8 Categorías con pesos desparejos, ingresos de los
+  últimos 35 años cargados hacia los recientes y algunas fechas de nacimiento vacías.
+- Activos: la foto del día anterior a hoy: los activos de BaseQuery salvo los ingresados hoy, los dados
+  de baja hoy, recategorizaciones y cambios de línea, y legajos que ya no figuran en BaseQuery.
+- CO: las filas de esos legajos desaparecidos.
+"""
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from dotacion import ORDEN_CATEGORIAS, ORDEN_LINEAS
+
+HOY = pd.Timestamp('2025-06-16')
+PESOS_LINEAS = [0.24, 0.2, 0.16, 0.14, 0.08, 0.1, 0.08]
+PESOS_CATEGORIAS = [0.03, 0.05, 0.07, 0.22, 0.2, 0.12, 0.21, 0.1]
+MOTIVOS_BAJA = ['Renuncia', 'Jubilación', 'Despido', 'Fin de contrato', 'Fallecimiento', 'Mutuo acuerdo']
+PESOS_MOTIVOS = [0.4, 0.3, 0.1, 0.1, 0.03, 0.07]
+APELLIDOS = ['GONZALEZ', 'RODRIGUEZ', 'GOMEZ', 'FERNANDEZ', 'LOPEZ', 'DIAZ', 'MARTINEZ', 'PEREZ', 'GARCIA', 'SANCHEZ',
+             'ROMERO', 'SOSA', 'ALVAREZ', 'TORRES', 'RUIZ', 'RAMIREZ', 'FLORES', 'BENITEZ', 'ACOSTA', 'MEDINA']
+NOMBRES = ['JUAN', 'CARLOS', 'JORGE', 'LUIS', 'MARIA', 'ANA', 'DIEGO', 'PABLO', 'LAURA', 'SERGIO',
+           'MARTIN', 'GABRIELA', 'CLAUDIO', 'SILVIA', 'RICARDO', 'ANDREA', 'HECTOR', 'VERONICA', 'MARCELO', 'NATALIA']
+COLUMNAS_BASE = ['Nº pers.', 'Apellido', 'Nombre de pila', 'Gr.prof.', 'División de personal', 'Status ocupación',
+                 'Fecha', 'Desde', 'Fecha nac.', 'Motivo de la medida']
+
+def _dias(rng, n, desde, hasta):
+    return desde + pd.to_timedelta(rng.integers(0, (hasta - desde).days + 1, n), unit='D')
+
+def generar_hojas(n, hoy=HOY, seed=0):
+    """Hojas del libro como DataFrames con los nombres de columna del Excel original."""
+    rng = np.random.default_rng(seed)
+    legajos = rng.choice(np.arange(10_000_000, 10_000_000 + 3 * n), n, replace=False)
+    # Antigüedad en días con cola hacia los ingresos recientes; un 0.5% ingresó hoy
+    antiguedad = np.minimum(rng.exponential(3000, n), 35 * 365).astype(int)
+    antiguedad[rng.random(n) < 0.005] = 0
+    fecha = hoy - pd.to_timedelta(antiguedad, unit='D')
+    nacimiento = fecha - pd.to_timedelta(rng.integers(19 * 365, 45 * 365, n), unit='D')
+    baja = rng.random(n) < 0.2
+    desde = np.where(baja, _dias(rng, n, hoy - pd.Timedelta(days=730), hoy), fecha)
+    # Un 1% de bajas con Desde mañana: el sistema registra la baja al día siguiente del último día trabajado
+    desde[baja & (rng.random(n) < 0.01)] = hoy + pd.Timedelta(days=1)
+    base = pd.DataFrame({
+        'Nº pers.': legajos,
+        'Apellido': rng.choice(APELLIDOS, n),
+        'Nombre de pila': rng.choice(NOMBRES, n),
+        'Gr.prof.': rng.choice(ORDEN_CATEGORIAS, n, p=PESOS_CATEGORIAS),
+        'División de personal': rng.choice(ORDEN_LINEAS, n, p=PESOS_LINEAS),
+        'Status ocupación': np.where(baja, 'Dado de baja', 'Activo'),
+        'Fecha': fecha,
+        'Desde': pd.to_datetime(desde),
+        'Fecha nac.': nacimiento,
+        'Motivo de la medida': np.where(baja, rng.choice(MOTIVOS_BAJA, n, p=PESOS_MOTIVOS), None),
+    })
+    base.loc[rng.random(n) < 0.01, 'Fecha nac.'] = pd.NaT
+
+    # Foto de ayer: activos de hoy que no ingresaron hoy más los que se dieron de baja hoy
+    ayer = base[((~baja) & (base['Fecha'] < hoy)) | (baja & (base['Desde'] >= hoy))].copy()
+    ayer['Status ocupación'] = 'Activo'
+    ayer['Motivo de la medida'] = None
+    recat = rng.random(len(ayer)) < 0.03
+    ayer.loc[recat, 'Gr.prof.'] = rng.choice(ORDEN_CATEGORIAS, recat.sum(), p=PESOS_CATEGORIAS)
+    cambio_linea = rng.random(len(ayer)) < 0.02
+    ayer.loc[cambio_linea, 'División de personal'] = rng.choice(ORDEN_LINEAS, cambio_linea.sum(), p=PESOS_LINEAS)
+
+    n_co = max(n // 200, 1)
+    co = pd.DataFrame({
+        'Nº pers.': np.arange(20_000_000, 20_000_000 + n_co),
+        'Apellido': rng.choice(APELLIDOS, n_co),
+        'Nombre de pila': rng.choice(NOMBRES, n_co),
+        'Gr.prof.': rng.choice(ORDEN_CATEGORIAS, n_co, p=PESOS_CATEGORIAS),
+        'División de personal': rng.choice(ORDEN_LINEAS, n_co, p=PESOS_LINEAS),
+        'Status ocupación': 'Activo',
+        'Fecha': _dias(rng, n_co, hoy - pd.Timedelta(days=20 * 365), hoy - pd.Timedelta(days=30)),
+        'Fecha nac.': _dias(rng, n_co, pd.Timestamp('1965-01-01'), pd.Timestamp('2000-01-01')),
+    })
+    activos = pd.concat([ayer.drop(columns=['Desde', 'Motivo de la medida']), co], ignore_index=True)
+    co = co.assign(Desde=_dias(rng, n_co, hoy - pd.Timedelta(days=365), hoy), **{'Status ocupación': 'Traslado'})
+    return {'BaseQuery': base[COLUMNAS_BASE], 'Activos': activos.sample(frac=1, random_state=seed), 'CO': co}
+
+def escribir_libro(hojas, destino):
+    """Escribe las hojas como .xlsx en destino (ruta o buffer)."""
+    with pd.ExcelWriter(destino, engine='openpyxl') as writer:
+        for nombre, df in hojas.items(): df.to_excel(writer, sheet_name=nombre, index=False)
+
+def escribir_por_linea(hojas, carpeta):
+    """Escribe un .xlsx por Línea en carpeta, como los exports de BaseQuery de cada Línea; devuelve las rutas."""
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for linea in ORDEN_LINEAS:
+        ruta = os.path.join(carpeta, f"{linea.replace(' ', '_')}.xlsx")
+        escribir_libro({nombre: df[df['División de personal'] == linea] for nombre, df in hojas.items()}, ruta)
+        rutas.append(ruta)
+    return rutas
+
+def libro_en_memoria(n, hoy=HOY, seed=0):
+    """Bytes de un .xlsx sintético de n filas en BaseQuery."""
+    buffer = io.BytesIO()
+    escribir_libro(generar_hojas(n, hoy, seed), buffer)
+    return buffer.getvalue()
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3: sys.exit(__doc__)
+    escribir_libro(generar_hojas(int(sys.argv[1]), seed=int(sys.argv[3]) if len(sys.argv) > 3 else 0), sys.argv[2])
@@ -0,0 +1,1261 @@
+import pandas as pd
+import numpy as np
+from fpdf import FPDF
+from openpyxl import load_workbook
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+import atexit
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import timedelta
+
+# Se asume Copy-on-Write (el comportamiento por defecto desde pandas 3): recortes, assign y rename comparten
+# memoria con el frame original hasta que se modifica alguno, así que no hay copias defensivas. En pandas 2
+# lo activan los puntos de entrada (app.py, generar_reportes.py) con activar_copy_on_write().
+def activar_copy_on_write():
+    if int(pd.__version__.split('.')[0]) == 2: pd.set_option('mode.copy_on_write', True)
+
+# --- 1. CONFIGURACIÓN Y ESTILOS ---
+COLOR_AZUL_INSTITUCIONAL = (4, 118, 208)
+COLOR_FONDO_CABECERA_TABLA = (70, 130, 180)
+COLOR_GRIS_FONDO_FILA = (240, 242, 246)
+COLOR_GRIS_LINEA = (220, 220, 220)
+COLOR_TEXTO_TITULO = (0, 51, 102)
+COLOR_TEXTO_CUERPO = (50, 50, 50)
+COLOR_CELESTE_PASTEL = (186, 225, 255)  # Celeste pastel para Cambio Categoría
+COLOR_AZUL_PASTEL_OSCURO = (120, 180, 235)  # Celeste/Azul un poco más oscuro para Cambio Línea
+COLOR_VERDE_ALTAS = (67, 160, 71)
+COLOR_ROJO_BAJAS = (229, 57, 53)
+
+class PDF(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_width = self.w - 2 * self.l_margin
+        self.report_title = "Resumen de Dotación"
+
+    def header(self):
+        self.set_font("Arial", "B", 18)
+        self.set_text_color(*COLOR_TEXTO_TITULO)
+        self.cell(0, 10, self.report_title, 0, 0, "C")
+        self.ln(15)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Arial", "I", 8)
+        self.set_text_color(128, 128, 128)
+        self.cell(0, 10, str(self.page_no()), 0, 0, "C")
+
+    def draw_section_title(self, title):
+        self.set_font("Arial", "B", 14)
+        self.set_text_color(*COLOR_TEXTO_TITULO)
+        self.cell(0, 10, title, ln=True, align="L")
+        self.set_draw_color(*COLOR_AZUL_INSTITUCIONAL)
+        self.set_line_width(0.5)
+        self.line(self.get_x(), self.get_y(), self.get_x() + self.page_width, self.get_y())
+        self.ln(5)
+
+    def draw_kpi_box(self, title, value, color, x, y, width=80):
+        kpi_height = 16
+        self.set_xy(x, y)
+        self.set_fill_color(*color)
+        self.cell(width, 1.5, "", fill=True, ln=False, border=0)
+        self.set_xy(x, y + 1.5)
+        self.set_fill_color(255, 255, 255)
+        self.set_draw_color(*COLOR_GRIS_LINEA)
+        self.cell(width, kpi_height - 1.5, "", border=1, fill=True)
+        self.set_xy(x, y + 3)
+        self.set_font('Arial', '', 10)
+        self.set_text_color(*COLOR_TEXTO_CUERPO)
+        self.cell(width, 8, title, align='C')
+        self.set_xy(x, y + 8)
+        self.set_font('Arial', 'B', 16)
+        self.set_text_color(*COLOR_TEXTO_TITULO)
+        self.cell(width, 10, str(value), align='C')
+
+    def _formatear_columna(self, nombre, serie):
+        """Textos de una columna tal como se imprimen en la tabla."""
+        if pd.api.types.is_numeric_dtype(serie) and nombre not in ['Nº pers.', 'Antigüedad', 'Edad']:
+            if "Prom." in str(nombre):
+                return [f"{round(x):.0f}" if isinstance(x, (int, float)) else str(x) for x in serie.tolist()]
+            return [f"{x:,.0f}".replace(',', '.') if isinstance(x, (int, float)) else str(x) for x in serie.tolist()]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            return [str(x) for x in serie]
+        return serie.astype(str).tolist()
+
+    def _ancho_maximo(self, textos):
+        """Ancho del texto más largo en la fuente actual, midiendo cada valor distinto una sola vez."""
+        cw = self.current_font['cw']
+        unidades = max(sum([cw.get(c, 0) for c in t]) for t in set(textos))
+        return unidades * self.font_size / 1000.0
+
+    def _draw_table_header(self, columnas, anchos):
+        self.set_font("Arial", "B", 8)
+        self.set_fill_color(*COLOR_FONDO_CABECERA_TABLA)
+        self.set_text_color(255, 255, 255)
+        for col, ancho in zip(columnas, anchos):
+            self.cell(ancho, 8, str(col), 0, 0, "C", True)
+        self.ln()
+        self.set_text_color(*COLOR_TEXTO_CUERPO)
+        self.set_fill_color(*COLOR_GRIS_FONDO_FILA)
+
+    def draw_table(self, title, df_original, is_crosstab=False):
+        if df_original.empty: return
+        df = df_original
+        if is_crosstab: 
+            df = df.replace(0, '-')
+            if df.index.name: df = df.reset_index()
+        
+        if self.get_y() + (8 * (len(df) + 1) + 10) > self.h - self.b_margin: self.add_page(orientation=self.cur_orientation)
+        self.draw_section_title(title)
+        
+        columnas = list(df.columns)
+        textos = [self._formatear_columna(col, df[col]) for col in columnas]
+        # Los anchos se miden con la fuente vigente (la del título de sección), igual que antes
+        textos_ancho = [t if not pd.api.types.is_datetime64_any_dtype(df[col]) else df[col].astype(str).tolist() for col, t in zip(columnas, textos)]
+        anchos = [max(self.get_string_width(str(col)), self._ancho_maximo(t)) + 10 for col, t in zip(columnas, textos_ancho)]
+        total_width = sum(anchos)
+        if total_width > self.page_width:
+            scaling_factor = self.page_width / total_width
+            anchos = [a * scaling_factor for a in anchos]
+        
+        self._draw_table_header(columnas, anchos)
+        self.set_draw_color(*COLOR_GRIS_LINEA)
+        self.set_line_width(0.2)
+        
+        estilo = None
+        limite = self.h - self.b_margin
+        for i, fila in enumerate(zip(*textos)):
+            if self.get_y() + 8 > limite:
+                self.add_page(orientation=self.cur_orientation)
+                self._draw_table_header(columnas, anchos)
+                estilo = None
+            
+            fill = i % 2 == 1
+            estilo_fila = "B" if "Total" in fila[0] else ""
+            if estilo_fila != estilo:
+                self.set_font("Arial", estilo_fila, 8)
+                estilo = estilo_fila
+            for texto, ancho in zip(fila, anchos):
+                self.cell(ancho, 8, texto, 'T', 0, "C", fill)
+            self.ln()
+        self.ln(10)
+
+    def draw_line_chart(self, title, etiquetas, series, alto=55):
+        """Gráfico de líneas sobre el eje de etiquetas. series: {nombre: (valores, color)}."""
+        if not etiquetas: return
+        if self.get_y() + alto + 32 > self.h - self.b_margin: self.add_page(orientation=self.cur_orientation)
+        self.draw_section_title(title)
+        valores = [v for vs, _ in series.values() for v in vs]
+        minimo, maximo = min(valores), max(valores)
+        if minimo == maximo: minimo, maximo = minimo - 1, maximo + 1
+        x0, y0 = self.l_margin + 18, self.get_y() + 2
+        ancho = self.page_width - 18
+        paso = ancho / max(len(etiquetas) - 1, 1)
+        pos_x = lambda i: x0 + i * paso if len(etiquetas) > 1 else x0 + ancho / 2
+        pos_y = lambda v: y0 + alto - (v - minimo) / (maximo - minimo) * alto
+
+        self.set_font('Arial', '', 7)
+        self.set_text_color(*COLOR_TEXTO_CUERPO)
+        self.set_draw_color(*COLOR_GRIS_LINEA)
+        self.set_line_width(0.2)
+        for i in range(5):
+            valor = minimo + (maximo - minimo) * i / 4
+            texto = f"{valor:,.0f}".replace(',', '.')
+            self.line(x0, pos_y(valor), x0 + ancho, pos_y(valor))
+            self.text(x0 - 2 - self.get_string_width(texto), pos_y(valor) + 1, texto)
+        # Como mucho unas 12 etiquetas en el eje x
+        cada = -(-len(etiquetas) // 12)
+        for i in range(0, len(etiquetas), cada):
+            self.text(pos_x(i) - self.get_string_width(etiquetas[i]) / 2, y0 + alto + 5, etiquetas[i])
+
+        self.set_line_width(0.6)
+        for valores_serie, color in series.values():
+            self.set_draw_color(*color)
+            self.set_fill_color(*color)
+            for i in range(1, len(valores_serie)): self.line(pos_x(i - 1), pos_y(valores_serie[i - 1]), pos_x(i), pos_y(valores_serie[i]))
+            if len(valores_serie) == 1: self.rect(pos_x(0) - 0.8, pos_y(valores_serie[0]) - 0.8, 1.6, 1.6, 'F')
+
+        x, y = x0, y0 + alto + 11
+        for nombre, (_, color) in series.items():
+            self.set_fill_color(*color)
+            self.rect(x, y - 2, 5, 2, 'F')
+            self.text(x + 7, y, nombre)
+            x += 14 + self.get_string_width(nombre)
+        self.set_y(y + 8)
+
+class _SalidaPDF:
+    """Reemplaza FPDF.buffer: FPDF hace buffer += texto y usa len(buffer) como offset; acá el texto va a un archivo."""
+    def __init__(self, destino):
+        self.destino = destino
+        self.escritos = 0
+
+    def __iadd__(self, texto):
+        datos = texto.encode('latin-1', 'replace')
+        self.destino.write(datos)
+        self.escritos += len(datos)
+        return self
+
+    def __len__(self):
+        return self.escritos
+
+class PDFPorPaginas(PDF):
+    """PDF que escribe cada página en destino (archivo binario) apenas se termina.
+
+    FPDF guarda todas las páginas y arma el documento entero como str al cerrarlo; acá sólo queda en memoria la
+    página en curso y el archivo resultante es el mismo. No admite alias_nb_pages ni links, que necesitan el
+    documento completo antes de escribir las páginas.
+    """
+    def __init__(self, destino, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer = _SalidaPDF(destino)
+
+    def _putheader(self):
+        if len(self.buffer) == 0: super()._putheader()
+
+    def _tamaño_pagina_pt(self):
+        return (self.fw_pt, self.fh_pt) if self.def_orientation == 'P' else (self.fh_pt, self.fw_pt)
+
+    def _endpage(self):
+        super()._endpage()
+        if hasattr(self, 'str_alias_nb_pages') or self.page_links: self.error("PDFPorPaginas no admite alias_nb_pages ni links")
+        self._putheader()
+        # Mismo contenido que FPDF._putpages para esta página; los objetos quedan numerados 3 + 2 * (página - 1)
+        w_pt, h_pt = self._tamaño_pagina_pt()
+        self._newobj()
+        self._out('<</Type /Page')
+        self._out('/Parent 1 0 R')
+        if self.page in self.orientation_changes: self._out(f'/MediaBox [0 0 {h_pt:.2f} {w_pt:.2f}]')
+        self._out('/Resources 2 0 R')
+        if self.pdf_version > '1.3': self._out('/Group <</Type /Group /S /Transparency /CS /DeviceRGB>>')
+        self._out(f'/Contents {self.n + 1} 0 R>>')
+        self._out('endobj')
+        contenido = zlib.compress(self.pages[self.page].encode('latin1')) if self.compress else self.pages[self.page]
+        self._newobj()
+        self._out('<<' + ('/Filter /FlateDecode ' if self.compress else '') + f'/Length {len(contenido)}>>')
+        self._putstream(contenido)
+        self._out('endobj')
+        self.pages[self.page] = ''
+
+    def _putpages(self):
+        # Las páginas ya se escribieron al terminar cada una: sólo falta la raíz /Pages
+        w_pt, h_pt = self._tamaño_pagina_pt()
+        self.offsets[1] = len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ''.join(f'{3 + 2 * i} 0 R ' for i in range(self.page)) + ']')
+        self._out(f'/Count {self.page}')
+        self._out(f'/MediaBox [0 0 {w_pt:.2f} {h_pt:.2f}]')
+        self._out('>>')
+        self._out('endobj')
+
+# Medición de etapas: desactivada salvo dentro de un bloque perfilar()
+logger_perfil = logging.getLogger('dotacion.perfil')
+_PERFIL = ContextVar('perfil_dotacion', default=None)
+_LOCK_TRACEMALLOC = threading.Lock()
+_usos_tracemalloc = 0
+
+class Perfilador:
+    """Tiempo, filas y memoria pico de cada etapa medida mientras está activo (ver perfilar).
+
+    La memoria se mide con tracemalloc sólo si memoria=True, porque hace más lento el código medido. Es
+    global al proceso: con varias sesiones midiendo a la vez, el pico incluye lo que asignen las otras.
+    """
+    def __init__(self, memoria=False, registrar_log=False, **contexto):
+        self.memoria = memoria
+        self.registrar_log = registrar_log
+        self.contexto = contexto
+        self.etapas = []
+
+    @contextmanager
+    def etapa(self, nombre, **contexto):
+        registro = {'etapa': nombre, **self.contexto, **contexto}
+        if self.memoria:
+            tracemalloc.reset_peak()
+            inicial = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['segundos'] = round(time.perf_counter() - t0, 4)
+            if self.memoria: registro['pico_mb'] = round((tracemalloc.get_traced_memory()[1] - inicial) / 2**20, 1)
+            self.etapas.append(registro)
+            if self.registrar_log: logger_perfil.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+    def tabla(self):
+        return pd.DataFrame(self.etapas)
+
+def _usar_tracemalloc(delta):
+    global _usos_tracemalloc
+    with _LOCK_TRACEMALLOC:
+        _usos_tracemalloc += delta
+        if delta > 0 and not tracemalloc.is_tracing(): tracemalloc.start()
+        elif _usos_tracemalloc == 0: tracemalloc.stop()
+
+@contextmanager
+def perfilar(memoria=False, registrar_log=False, **contexto):
+    """Mide las etapas que corran en este hilo hasta salir del bloque y devuelve el Perfilador.
+
+    contexto (p. ej. reporte='Mensual') se agrega a cada registro.
+    """
+    perfil = Perfilador(memoria, registrar_log, **contexto)
+    if memoria: _usar_tracemalloc(1)
+    token = _PERFIL.set(perfil)
+    try:
+        yield perfil
+    finally:
+        _PERFIL.reset(token)
+        if memoria: _usar_tracemalloc(-1)
+
+def etapa(nombre, **contexto):
+    """Bloque medido por el Perfilador activo. Sin perfilador sólo entrega un dict descartable."""
+    perfil = _PERFIL.get()
+    return nullcontext({}) if perfil is None else perfil.etapa(nombre, **contexto)
+
+# --- 2. LÓGICA DE CÁLCULO ---
+def calcular_años(fecha_inicio, fecha_fin):
+    if pd.isna(fecha_inicio) or pd.isna(fecha_fin): return 0
+    return (fecha_fin - fecha_inicio).days / 365.25
+
+def calcular_años_vector(fechas_inicio, fechas_fin):
+    """Equivalente vectorizado de calcular_años. fechas_fin puede ser una fecha o una Serie alineada."""
+    dias = (fechas_fin - pd.to_datetime(fechas_inicio)).dt.days
+    return (dias / 365.25).fillna(0)
+
+def agregar_antiguedad_edad(df, fecha_ref):
+    """df con las columnas Antigüedad y Edad calculadas a fecha_ref (fecha o Serie). No modifica df."""
+    return df.assign(**{
+        'Antigüedad': calcular_años_vector(df['Fecha'], fecha_ref),
+        'Edad': calcular_años_vector(df['Fecha nac.'], fecha_ref),
+    })
+
+def generar_resumen_completo(df_datos, index_col='Categoría', columns_col='Línea', incluir_promedios=True):
+    incluir_promedios = incluir_promedios and 'Antigüedad' in df_datos.columns and 'Edad' in df_datos.columns
+    return generar_resumen_desde_celdas(celdas_de_filas(df_datos), index_col, columns_col, incluir_promedios)
+
+def celdas_de_filas(df_datos):
+    """Trata cada fila como una celda de cubo con n=1, para resumir frames chicos con generar_resumen_desde_celdas."""
+    if df_datos.empty: return df_datos
+    return df_datos.assign(n=1, suma_antig=df_datos.get('Antigüedad', 0), suma_edad=df_datos.get('Edad', 0))
+
+def generar_resumen_desde_celdas(celdas, index_col='Categoría', columns_col='Línea', incluir_promedios=True):
+    """Mismo resultado que generar_resumen_completo, armado desde celdas pre-agregadas del cubo.
+
+    celdas tiene una fila por combinación de claves con 'n' y, para los promedios, 'suma_antig' y 'suma_edad'.
+    Como pd.crosstab, la tabla cuenta sólo filas con ambas claves; los promedios usan todas.
+    """
+    if celdas.empty or celdas['n'].sum() == 0: return pd.DataFrame()
+    validas = celdas.dropna(subset=[index_col, columns_col])
+    resumen = validas[validas['n'] > 0].groupby([index_col, columns_col], observed=True)['n'].sum().unstack(fill_value=0)
+    resumen.index = pd.Index(list(resumen.index), dtype=object, name=index_col)
+    resumen.columns = pd.Index(list(resumen.columns), dtype=object, name=columns_col)
+    resumen['Total'] = resumen.sum(axis=1)
+    resumen.loc['Total'] = resumen.sum()
+
+    if incluir_promedios:
+        por_fila = celdas.groupby(index_col, observed=True)[['n', 'suma_antig', 'suma_edad']].sum()
+        totales = celdas[['n', 'suma_antig', 'suma_edad']].sum()
+        resumen['Antig. Prom.'] = pd.Series(
+            list(por_fila['suma_antig'] / por_fila['n']) + [totales['suma_antig'] / totales['n']], index=list(por_fila.index) + ['Total'])
+        resumen['Edad Prom.'] = pd.Series(
+            list(por_fila['suma_edad'] / por_fila['n']) + [totales['suma_edad'] / totales['n']], index=list(por_fila.index) + ['Total'])
+
+    return resumen
+
+COLUMNAS_IDENTIDAD = ['Nº pers.', 'Apellido', 'Nombre de pila']
+COLUMNAS_SEGUIDAS = ['Categoría', 'Línea']
+
+@dataclass
+class DiferenciasFoto:
+    """Novedades entre BaseQuery y la foto anterior de Activos, obtenidas de un único cruce por legajo."""
+    altas: pd.DataFrame
+    bajas: pd.DataFrame
+    desaparecidos: pd.Index
+    co: pd.DataFrame
+    cambios: dict
+
+def _distintos(actual, anterior):
+    """actual != anterior por fila. Cada hoja tiene sus propias categorías: si no coinciden se compara por valor."""
+    if isinstance(actual.dtype, pd.CategoricalDtype) or isinstance(anterior.dtype, pd.CategoricalDtype):
+        if actual.dtype != anterior.dtype: return actual.astype(object) != anterior.astype(object)
+    return actual != anterior
+
+def comparar_fotos(df_base, df_activos_prev, df_co=None, columnas_seguidas=COLUMNAS_SEGUIDAS):
+    """Cruza una sola vez BaseQuery con la foto de Activos y clasifica todas las novedades.
+
+    - altas: activos en BaseQuery que no estaban en la foto.
+    - bajas: dados de baja en BaseQuery que estaban en la foto.
+    - desaparecidos / co: legajos de la foto ausentes en BaseQuery y sus filas de la hoja CO.
+    - cambios[col]: activos cuyo valor de col difiere del de la foto ('<col> Anterior' / '<col> Actual').
+    """
+    vacio = pd.DataFrame()
+    if df_base.empty:
+        return DiferenciasFoto(vacio, vacio, pd.Index([]), vacio, {col: vacio for col in columnas_seguidas})
+
+    seguidas = [col for col in columnas_seguidas if col in df_base.columns and col in df_activos_prev.columns]
+    if CLAVE_LEGAJO in df_activos_prev.columns:
+        foto = df_activos_prev[[CLAVE_LEGAJO] + seguidas].dropna(subset=[CLAVE_LEGAJO]).drop_duplicates(CLAVE_LEGAJO).set_index(CLAVE_LEGAJO)
+    else:
+        foto = pd.DataFrame(columns=seguidas, index=pd.Index([], name=CLAVE_LEGAJO))
+
+    # Único cruce: posición de cada legajo de BaseQuery en la foto (-1 si no estaba). Sin legajo no se
+    # puede saber si estaba: esas filas no cuentan como alta ni como baja
+    con_legajo = df_base[CLAVE_LEGAJO].notna().to_numpy()
+    pos = np.full(len(df_base), -1, dtype=np.intp)
+    pos[con_legajo] = foto.index.get_indexer(df_base[CLAVE_LEGAJO][con_legajo])
+    en_foto = pos >= 0
+    activo = (df_base['Status ocupación'] == 'Activo').to_numpy()
+    baja = (df_base['Status ocupación'] == 'Dado de baja').to_numpy()
+
+    encontrados = np.zeros(len(foto), dtype=bool)
+    encontrados[pos[en_foto]] = True
+    desaparecidos = foto.index[~encontrados]
+    co = df_co[df_co[CLAVE_LEGAJO].isin(desaparecidos)] if df_co is not None and not df_co.empty else vacio
+
+    hoy = df_base[en_foto & activo]
+    pos_hoy = pos[en_foto & activo]
+    cambios = {}
+    for col in columnas_seguidas:
+        if col not in seguidas or hoy.empty:
+            cambios[col] = vacio
+            continue
+        anterior = foto[col].iloc[pos_hoy].set_axis(hoy.index)
+        distinto = _distintos(hoy[col], anterior)
+        contexto = [c for c in COLUMNAS_SEGUIDAS if c != col and c in hoy.columns]
+        df_cambio = hoy.loc[distinto, [c for c in COLUMNAS_IDENTIDAD if c != col] + contexto + [col]].rename(columns={col: f'{col} Actual'})
+        df_cambio[f'{col} Anterior'] = anterior[distinto]
+        cambios[col] = df_cambio
+
+    return DiferenciasFoto(df_base[~en_foto & activo & con_legajo], df_base[en_foto & baja], desaparecidos, co, cambios)
+
+def procesar_recategorizaciones(df_base, df_activos_prev):
+    """Detecta quiénes están activos hoy y cambiaron su categoría respecto a la foto de Activos."""
+    if df_activos_prev.empty: return pd.DataFrame()
+    return comparar_fotos(df_base, df_activos_prev, columnas_seguidas=['Categoría']).cambios['Categoría']
+
+def procesar_cambios_linea(df_base, df_activos_prev):
+    """Detecta quiénes están activos hoy y cambiaron su Línea respecto a la foto de Activos."""
+    if df_activos_prev.empty: return pd.DataFrame()
+    return comparar_fotos(df_base, df_activos_prev, columnas_seguidas=['Línea']).cambios['Línea']
+
+# --- 3. PROCESAMIENTO ---
+RENOMBRES_COLUMNAS = {
+    'Gr.prof.': 'Categoría', 'División de personal': 'Línea', 'Division de personal': 'Línea',
+    'Motivo de la medida': 'Motivo de Baja',
+}
+COLUMNAS_FECHA = ['Fecha', 'Desde', 'Fecha nac.']
+ORDEN_LINEAS = ['ROCA', 'MITRE', 'SARMIENTO', 'SAN MARTIN', 'BELGRANO SUR', 'REGIONALES', 'CENTRAL']
+ORDEN_CATEGORIAS = ['COOR.E.T', 'INST.TEC', 'INS.CERT', 'CON.ELEC', 'CON.DIES', 'AY.CON.H', 'AY.CONDU', 'ASP.AY.C']
+HOJAS_LIBRO = ['BaseQuery', 'Activos', 'CO']
+# Esquema compacto que se aplica al leer cada hoja, además de datetime64 en COLUMNAS_FECHA
+TIPOS_COLUMNAS = {
+    'Línea': pd.CategoricalDtype(ORDEN_LINEAS, ordered=True),
+    'Categoría': pd.CategoricalDtype(ORDEN_CATEGORIAS, ordered=True),
+    'Status ocupación': 'category',
+    'Motivo de Baja': 'category',
+}
+MAX_PROPORCION_DISTINTOS = 0.5  # otras columnas de texto pasan a categórico si repiten al menos la mitad de sus valores
+CLAVE_LEGAJO = 'clave_legajo'
+MAX_LIBROS_EN_CACHE = 4
+MAX_PDFS_EN_CACHE = 16
+MAX_PROCESOS_LECTURA = min(4, os.cpu_count() or 1)  # pool de lectura compartido por todas las sesiones
+
+def _texto_repetido(serie):
+    return pd.api.types.infer_dtype(serie, skipna=True) == 'string' and serie.nunique() <= len(serie) * MAX_PROPORCION_DISTINTOS
+
+def normalizar_hoja(df):
+    """Aplica renombres y el esquema compacto (fechas, categorías ordenadas, categóricos) a una hoja recién leída."""
+    df.rename(columns=RENOMBRES_COLUMNAS, inplace=True)
+    for col in COLUMNAS_FECHA:
+        if col in df.columns: df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col, tipo in TIPOS_COLUMNAS.items():
+        if col in df.columns: df[col] = df[col].astype(tipo)
+    for col in df.columns[df.dtypes == object]:
+        if col != 'Nº pers.' and _texto_repetido(df[col]): df[col] = df[col].astype('category')
+    return df
+
+def procesar_archivo_base(archivo_cargado, sheet_name='BaseQuery'):
+    """Lee y normaliza una hoja. Si el libro no la tiene devuelve un DataFrame vacío; cualquier otro error se propaga."""
+    with pd.ExcelFile(archivo_cargado, engine='openpyxl') as libro:
+        if sheet_name not in libro.sheet_names: return pd.DataFrame()
+        df = libro.parse(sheet_name)
+    return normalizar_hoja(df)
+
+def _legajos_como_texto(col):
+    """Legajos como texto sin espacios; celdas vacías o en blanco quedan como NA."""
+    if pd.api.types.is_numeric_dtype(col): return col.astype('string')
+    texto = col.astype('string').str.strip()
+    return texto.mask(texto == '')
+
+def agregar_clave_legajo(hojas):
+    """Agrega a cada hoja con 'Nº pers.' la clave normalizada CLAVE_LEGAJO, común a todas las hojas.
+
+    La clave es entera si todos los legajos son numéricos y, si no, un categórico con las mismas
+    categorías en todas las hojas, para que isin/merge comparen sin volver a normalizar strings. Cada
+    valor entero se normaliza por separado (10004152.0 y '10004152' dan la misma clave), y los legajos
+    vacíos quedan como NA: no cambian el tipo de la clave ni coinciden con ningún otro.
+    """
+    con_legajo = [df for df in hojas if 'Nº pers.' in df.columns]
+    textos = [_legajos_como_texto(df['Nº pers.']) for df in con_legajo]
+    numeros = [df['Nº pers.'] if pd.api.types.is_numeric_dtype(df['Nº pers.']) else pd.to_numeric(t, errors='coerce') for df, t in zip(con_legajo, textos)]
+    enteros = [n.notna() & (n % 1 == 0) for n in numeros]
+    if all((e | t.isna()).all() for e, t in zip(enteros, textos)):
+        hay_vacios = any(t.isna().any() for t in textos)
+        claves = [n.astype('Int64' if hay_vacios else 'int64') for n in numeros]
+    else:
+        claves = [t.mask(e, n[e].astype('int64').astype('string')) for t, n, e in zip(textos, numeros, enteros)]
+        categorias = pd.Index(pd.concat(claves, ignore_index=True).dropna().unique().astype(object))
+        claves = [pd.Series(pd.Categorical(c.astype(object).where(c.notna(), np.nan), categories=categorias), index=c.index) for c in claves]
+    for df, clave in zip(con_legajo, claves):
+        # Legajos numéricos que Excel dejó como float (p. ej. por celdas vacías) pasan a enteros
+        if pd.api.types.is_float_dtype(df['Nº pers.']) and pd.api.types.is_integer_dtype(clave): df['Nº pers.'] = clave
+        df[CLAVE_LEGAJO] = clave
+
+def _sin_repetidos(columnas):
+    """Renombra cabeceras repetidas como read_excel: 'Texto', 'Texto.1'..., salteando nombres que ya existen."""
+    vistos = defaultdict(int)
+    resultado = []
+    for col in columnas:
+        original, n = col, vistos[col]
+        while n > 0:
+            vistos[original] = n + 1
+            col = f"{original}.{n}"
+            n = n + 1 if col in columnas else vistos[col]
+        resultado.append(col)
+        vistos[col] = n + 1
+    return resultado
+
+def _hoja_a_dataframe(ws):
+    """Convierte una hoja de openpyxl (read-only) en DataFrame, con la primera fila como cabecera."""
+    filas = ws.iter_rows(values_only=True)
+    cabecera = next(filas, None)
+    if cabecera is None: return pd.DataFrame()
+    datos = list(filas)
+    while datos and all(v is None for v in datos[-1]): datos.pop()
+    columnas = _sin_repetidos([c if c is not None else f"Unnamed: {i}" for i, c in enumerate(cabecera)])
+    # read_excel deja las celdas vacías como NaN; openpyxl devuelve None
+    return pd.DataFrame(datos, columns=columnas).fillna(np.nan)
+
+@dataclass
+class EventosOrdenados:
+    """Filas de una hoja más su orden por fecha (estable, sin fecha al final), sin guardar una copia reordenada."""
+    df: pd.DataFrame
+    orden: np.ndarray
+    fechas: np.ndarray
+
+@dataclass
+class IndiceEventos:
+    """Novedades ordenadas por fecha, para recortar cualquier período con searchsorted."""
+    altas: EventosOrdenados
+    bajas: EventosOrdenados
+    co: EventosOrdenados
+
+def _ordenar_por(df, col):
+    return df.sort_values(by=col, kind='stable', na_position='last') if not df.empty else df
+
+def _ordenar_eventos(df, col):
+    if df.empty: return EventosOrdenados(df, np.array([], dtype=np.intp), np.array([], dtype='datetime64[ns]'))
+    fechas = df[col].to_numpy()
+    orden = np.argsort(fechas, kind='stable')  # numpy deja NaT al final
+    return EventosOrdenados(df, orden, fechas[orden])
+
+def indexar_eventos(df_base, df_co):
+    """altas: BaseQuery por Fecha; bajas: dados de baja con Desde corregido (-1 día) y ordenados por él; co: por Desde.
+
+    Un CO sin columna Desde queda vacío, como en procesar_metricas_novedades.
+    """
+    co = _ordenar_eventos(df_co if 'Desde' in df_co.columns else df_co.iloc[:0], 'Desde')
+    if df_base.empty: return IndiceEventos(_ordenar_eventos(df_base, None), _ordenar_eventos(df_base, None), co)
+    df_bajas = df_base[df_base['Status ocupación'] == 'Dado de baja']
+    if not df_bajas.empty: df_bajas = df_bajas.assign(Desde=df_bajas['Desde'] - pd.Timedelta(days=1))
+    return IndiceEventos(_ordenar_eventos(df_base, 'Fecha'), _ordenar_eventos(df_bajas, 'Desde'), co)
+
+def _ventana(eventos, fecha_inicio, fecha_fin):
+    """Filas con fecha_inicio <= fecha <= fecha_fin, ya en orden. Sólo copia las filas de la ventana."""
+    if eventos.df.empty: return eventos.df
+    desde = eventos.fechas.searchsorted(np.datetime64(fecha_inicio), side='left')
+    hasta = eventos.fechas.searchsorted(np.datetime64(fecha_fin), side='right')
+    return eventos.df.take(eventos.orden[desde:hasta])
+
+def filtrar_novedades_por_fecha(eventos, fecha_inicio, fecha_fin):
+    """Altas por Fecha, bajas por Desde corregido y CO por Desde dentro de [fecha_inicio, fecha_fin], ordenadas."""
+    return (
+        _ventana(eventos.altas, fecha_inicio, fecha_fin),
+        _ventana(eventos.bajas, fecha_inicio, fecha_fin),
+        _ventana(eventos.co, fecha_inicio, fecha_fin),
+    )
+
+CLAVES_CUBO = ['Línea', 'Categoría', 'Motivo de Baja']
+EPOCA = pd.Timestamp('1970-01-01')
+
+@dataclass
+class CuboDotacion:
+    """Conteos y sumas pre-agregados por (fecha, Línea, Categoría, Motivo de Baja), ordenados por fecha.
+
+    - activos: activos por Fecha de ingreso, con cantidad y suma de días (desde 1970) de Fecha y Fecha nac.
+      válidas, para obtener la antigüedad y la edad a cualquier fecha de referencia.
+    - altas: todas las filas por Fecha.
+    - bajas: dados de baja por Desde corregido, con la suma de su Antigüedad y Edad a esa fecha.
+    """
+    activos: pd.DataFrame
+    altas: pd.DataFrame
+    bajas: pd.DataFrame
+
+def _dias_desde_epoca(fechas):
+    """Días enteros desde 1970 (redondeando hacia arriba, como .days de fecha_ref - fecha); NaN si no hay fecha."""
+    return (pd.to_datetime(fechas).dt.ceil('D') - EPOCA).dt.days
+
+def _agregar_cubo(df, col_fecha, valores, agregaciones):
+    """Agrupa df por (col_fecha, CLAVES_CUBO) con la cantidad de filas 'n' más las agregaciones pedidas sobre valores."""
+    claves = [c for c in CLAVES_CUBO if c in df.columns]
+    datos = df[claves].assign(fecha=df[col_fecha], n=1, **valores)
+    cubo = datos.groupby(['fecha'] + claves, dropna=False, observed=True, sort=False).agg(n=('n', 'sum'), **agregaciones)
+    return _ordenar_por(cubo.reset_index(), 'fecha').reset_index(drop=True)
+
+def construir_cubo(df_base, eventos):
+    vacio = pd.DataFrame()
+    if df_base.empty: return CuboDotacion(vacio, vacio, vacio)
+    activos = df_base[df_base['Status ocupación'] == 'Activo']
+    cubo_activos = _agregar_cubo(
+        activos, 'Fecha',
+        {'dias_fecha': _dias_desde_epoca(activos['Fecha']), 'dias_nac': _dias_desde_epoca(activos['Fecha nac.'])},
+        {'n_fecha': ('dias_fecha', 'count'), 'dias_fecha': ('dias_fecha', 'sum'), 'n_nac': ('dias_nac', 'count'), 'dias_nac': ('dias_nac', 'sum')},
+    )
+    cubo_altas = _agregar_cubo(df_base, 'Fecha', {}, {})
+    cubo_bajas = vacio
+    if not eventos.bajas.df.empty:
+        df_bajas = agregar_antiguedad_edad(eventos.bajas.df, eventos.bajas.df['Desde'])
+        cubo_bajas = _agregar_cubo(
+            df_bajas, 'Desde',
+            {'suma_antig': df_bajas['Antigüedad'], 'suma_edad': df_bajas['Edad']},
+            {'suma_antig': ('suma_antig', 'sum'), 'suma_edad': ('suma_edad', 'sum')},
+        )
+    return CuboDotacion(cubo_activos, cubo_altas, cubo_bajas)
+
+def sumar_celdas(cubo, claves, fecha_inicio=None, fecha_fin=None):
+    """Suma las celdas del cubo con fecha en [fecha_inicio, fecha_fin] (sin límite si es None), agrupadas por claves."""
+    if cubo.empty: return cubo
+    fechas = cubo['fecha'].to_numpy()
+    desde = fechas.searchsorted(np.datetime64(fecha_inicio), side='left') if fecha_inicio is not None else 0
+    hasta = fechas.searchsorted(np.datetime64(fecha_fin), side='right') if fecha_fin is not None else len(cubo)
+    tramo = cubo.iloc[desde:hasta]
+    return tramo.groupby(claves, dropna=False, observed=True).sum(numeric_only=True).reset_index()
+
+def celdas_activos_a_fecha(cubo, fecha_ref, hasta_ingreso=None):
+    """Celdas Categoría x Línea de los activos ingresados hasta hasta_ingreso, con antigüedad y edad sumadas a fecha_ref."""
+    celdas = sumar_celdas(cubo.activos, ['Línea', 'Categoría'], fecha_fin=hasta_ingreso)
+    if celdas.empty: return celdas
+    ref = (pd.Timestamp(fecha_ref).normalize() - EPOCA).days
+    return celdas.assign(
+        suma_antig=(celdas['n_fecha'] * ref - celdas['dias_fecha']) / 365.25,
+        suma_edad=(celdas['n_nac'] * ref - celdas['dias_nac']) / 365.25,
+    )
+
+@dataclass
+class LibroDotacion:
+    """Hojas ya normalizadas de un Excel de dotación. Se comparten desde la caché: no modificar in-place."""
+    hash_archivo: str
+    base: pd.DataFrame
+    activos: pd.DataFrame
+    co: pd.DataFrame
+    diferencias: DiferenciasFoto
+    eventos: IndiceEventos
+    cubo: CuboDotacion
+
+class FotoActivos:
+    """Activos registrados en el historial a una fecha (ver historial.py).
+
+    Con cargar (sin activos) las filas se leen recién la primera vez que se usa activos: la fecha alcanza
+    para la caché de PDF y para mostrar de qué foto sale un reporte.
+    """
+    def __init__(self, fecha, activos=None, cargar=None):
+        self.fecha = fecha
+        self._activos = activos
+        self._cargar = cargar
+
+    @property
+    def activos(self):
+        if self._activos is None: self._activos = self._cargar()
+        return self._activos
+
+def leer_libro(contenido):
+    """Lee BaseQuery, Activos y CO en una sola pasada de openpyxl. Las hojas ausentes quedan vacías."""
+    hojas = _leer_hojas(contenido)
+    with etapa('normalización', hoja='claves') as r:
+        agregar_clave_legajo(hojas.values())
+        r['filas'] = sum(len(df) for df in hojas.values())
+    return hojas
+
+def _leer_hojas(contenido):
+    """Hojas del libro normalizadas, todavía sin CLAVE_LEGAJO (que depende de todas las hojas juntas)."""
+    wb = load_workbook(io.BytesIO(contenido), read_only=True, data_only=True)
+    try:
+        hojas = {}
+        for nombre in HOJAS_LIBRO:
+            if nombre not in wb.sheetnames:
+                hojas[nombre] = pd.DataFrame()
+                continue
+            with etapa('carga', hoja=nombre) as r:
+                df = _hoja_a_dataframe(wb[nombre])
+                r['filas'] = len(df)
+            with etapa('normalización', hoja=nombre) as r:
+                hojas[nombre] = normalizar_hoja(df)
+                r['filas'] = len(df)
+    finally:
+        wb.close()
+    return hojas
+
+def _sin_legajos_repetidos(df, nombre):
+    """Deja una fila por legajo. En BaseQuery gana la fila Activo y, entre iguales, la de Desde más reciente."""
+    if CLAVE_LEGAJO not in df.columns: return df
+    orden = df.index
+    if nombre == 'BaseQuery':
+        prioridad = pd.DataFrame({
+            'inactivo': (df['Status ocupación'] != 'Activo').to_numpy() if 'Status ocupación' in df.columns else False,
+            'desde': df['Desde'] if 'Desde' in df.columns else pd.NaT,
+        }, index=df.index)
+        orden = prioridad.sort_values(['inactivo', 'desde'], ascending=[True, False], kind='stable', na_position='last').index
+    claves = df[CLAVE_LEGAJO].reindex(orden)
+    repetido = (claves.duplicated() & claves.notna()).to_numpy()
+    if not repetido.any(): return df
+    return df.loc[orden[~repetido].sort_values()].reset_index(drop=True)
+
+def consolidar_hojas(libros):
+    """Une las hojas de varios libros (p. ej. un export de BaseQuery por Línea) como si fueran un solo Excel.
+
+    Cada hoja se concatena y se vuelve a normalizar con las mismas reglas que procesar_archivo_base; un
+    legajo que figura en más de un libro queda una sola vez (ver _sin_legajos_repetidos).
+    """
+    hojas = {}
+    for nombre in HOJAS_LIBRO:
+        partes = [h[nombre] for h in libros if not h[nombre].empty]
+        hojas[nombre] = normalizar_hoja(pd.concat(partes, ignore_index=True)) if partes else pd.DataFrame()
+    agregar_clave_legajo(hojas.values())
+    with etapa('normalización', hoja='repetidos') as r:
+        filas = sum(len(df) for df in hojas.values())
+        hojas = {nombre: _sin_legajos_repetidos(df, nombre) for nombre, df in hojas.items()}
+        r['filas'] = filas
+        r['repetidos'] = filas - sum(len(df) for df in hojas.values())
+    return hojas
+
+_pool_lectura = None
+_LOCK_POOL_LECTURA = threading.Lock()
+
+def _nuevo_pool(procesos):
+    # spawn y no fork: el servidor de Streamlit tiene varios hilos y un fork copiaría sus locks tomados
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn'))
+
+def _pool_compartido():
+    """Pool de MAX_PROCESOS_LECTURA procesos, creado una vez y compartido por todas las sesiones."""
+    global _pool_lectura
+    with _LOCK_POOL_LECTURA:
+        if _pool_lectura is None: _pool_lectura = _nuevo_pool(MAX_PROCESOS_LECTURA)
+    return _pool_lectura
+
+def leer_libros(contenidos, procesos=None):
+    """Lee varios libros en paralelo (openpyxl es CPU: un proceso por libro) y los consolida en uno.
+
+    Sin procesos usa el pool compartido, así varias sesiones no suman procesos; con procesos (p. ej. desde
+    el CLI) arma un pool propio de ese tamaño, y con 1 lee en este proceso.
+    """
+    en_paralelo = len(contenidos) > 1 and (MAX_PROCESOS_LECTURA if procesos is None else procesos) > 1
+    if not en_paralelo:
+        # Cada hoja ya registra su propia etapa de carga
+        return consolidar_hojas([_leer_hojas(c) for c in contenidos])
+    with etapa('carga', libros=len(contenidos), procesos=procesos or MAX_PROCESOS_LECTURA) as r:
+        if procesos is None: libros = list(_pool_compartido().map(_leer_hojas, contenidos))
+        else:
+            with _nuevo_pool(min(procesos, len(contenidos))) as pool: libros = list(pool.map(_leer_hojas, contenidos))
+        r['filas'] = sum(len(h['BaseQuery']) for h in libros)
+    return consolidar_hojas(libros)
+
+class CacheLRU:
+    """Diccionario acotado a max_items que descarta lo menos usado. Compartido entre sesiones de Streamlit.
+
+    al_descartar(valor) se llama con cada valor que sale de la caché, p. ej. para borrar un archivo.
+    """
+    def __init__(self, max_items, al_descartar=None):
+        self.max_items = max_items
+        self.al_descartar = al_descartar
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            if clave not in self._items: return None
+            self._items.move_to_end(clave)
+            return self._items[clave]
+
+    def put(self, clave, valor):
+        with self._lock: descartados = self._guardar(clave, valor)
+        self._descartar(descartados)
+        return valor
+
+    def setdefault(self, clave, valor, vigente=None):
+        """Como put, pero si clave ya está (y vigente(guardado) no es falso) deja el valor guardado y lo devuelve."""
+        with self._lock:
+            if clave in self._items and (vigente is None or vigente(self._items[clave])):
+                self._items.move_to_end(clave)
+                return self._items[clave]
+            descartados = self._guardar(clave, valor)
+        self._descartar(descartados)
+        return valor
+
+    def _guardar(self, clave, valor):
+        descartados = [self._items[clave]] if clave in self._items and self._items[clave] is not valor else []
+        self._items[clave] = valor
+        self._items.move_to_end(clave)
+        while len(self._items) > self.max_items: descartados.append(self._items.popitem(last=False)[1])
+        return descartados
+
+    def _descartar(self, descartados):
+        if self.al_descartar is not None:
+            for viejo in descartados: self.al_descartar(viejo)
+
+_CACHE_LIBROS = CacheLRU(MAX_LIBROS_EN_CACHE)
+
+def _contenido(archivo):
+    if hasattr(archivo, 'getvalue'): return archivo.getvalue()
+    with open(archivo, 'rb') as f: return f.read()
+
+def archivos_de_carpeta(carpeta):
+    """Los .xlsx de una carpeta en orden alfabético, sin los temporales de Excel (~$...)."""
+    return [os.path.join(carpeta, n) for n in sorted(os.listdir(carpeta)) if n.lower().endswith('.xlsx') and not n.startswith('~$')]
+
+def cargar_libro(archivo_cargado, procesos=None):
+    """Devuelve el LibroDotacion del archivo, reutilizando el ya parseado si el contenido no cambió.
+
+    archivo_cargado puede ser una ruta, un archivo subido, una carpeta o una lista de archivos: varios
+    libros se leen en paralelo (ver leer_libros para procesos) y se consolidan en uno (ver consolidar_hojas).
+    """
+    if isinstance(archivo_cargado, (str, os.PathLike)) and os.path.isdir(archivo_cargado):
+        archivo_cargado = archivos_de_carpeta(archivo_cargado)
+        if not archivo_cargado: raise FileNotFoundError("La carpeta no tiene archivos .xlsx.")
+    varios = isinstance(archivo_cargado, (list, tuple))
+    contenidos = [_contenido(a) for a in archivo_cargado] if varios else [_contenido(archivo_cargado)]
+    with etapa('caché', bytes=sum(len(c) for c in contenidos)) as r:
+        hashes = [hashlib.sha256(c).hexdigest() for c in contenidos]
+        # Varios libros: el orden importa para desempatar legajos repetidos
+        hash_archivo = hashlib.sha256(''.join(hashes).encode()).hexdigest() if varios else hashes[0]
+        libro = _CACHE_LIBROS.get(hash_archivo)
+        r['acierto'] = libro is not None
+    if libro is not None: return libro
+    hojas = leer_libros(contenidos, procesos) if varios else leer_libro(contenidos[0])
+    with etapa('diferencias') as r:
+        diferencias = comparar_fotos(hojas['BaseQuery'], hojas['Activos'], hojas['CO'])
+        r['filas'] = len(hojas['BaseQuery'])
+    with etapa('agregados') as r:
+        eventos = indexar_eventos(hojas['BaseQuery'], diferencias.co)
+        cubo = construir_cubo(hojas['BaseQuery'], eventos)
+        r['filas'] = len(cubo.activos) + len(cubo.altas) + len(cubo.bajas)
+    libro = LibroDotacion(
+        hash_archivo, hojas['BaseQuery'], hojas['Activos'], hojas['CO'], diferencias, eventos, cubo,
+    )
+    return _CACHE_LIBROS.put(hash_archivo, libro)
+
+def procesar_metricas_novedades(df_altas_raw, df_bajas_raw, df_co_raw, fecha_ref):
+    """Novedades con Antigüedad y Edad, y sus versiones para mostrar. No modifica las entradas."""
+    df_bajas, df_bajas_vis = df_bajas_raw, pd.DataFrame()
+    if not df_bajas.empty:
+        df_bajas = agregar_antiguedad_edad(df_bajas, df_bajas['Desde'])
+        df_bajas_vis = df_bajas.assign(**{
+            'Antigüedad': df_bajas['Antigüedad'].round().astype('int64'),
+            'Fecha nac.': df_bajas['Fecha nac.'].dt.strftime('%d/%m/%Y'),
+            'Desde': df_bajas['Desde'].dt.strftime('%d/%m/%Y'),
+        })
+
+    df_altas, df_altas_vis = df_altas_raw, pd.DataFrame()
+    if not df_altas.empty:
+        df_altas = agregar_antiguedad_edad(df_altas, fecha_ref)
+        df_altas_vis = df_altas.assign(**{
+            'Fecha': df_altas['Fecha'].dt.strftime('%d/%m/%Y'),
+            'Fecha nac.': df_altas['Fecha nac.'].dt.strftime('%d/%m/%Y'),
+        })
+
+    df_co, df_co_vis = df_co_raw, pd.DataFrame()
+    if not df_co.empty and 'Desde' in df_co.columns:
+        df_co = df_co_vis = agregar_antiguedad_edad(df_co, df_co['Desde'])
+        if pd.api.types.is_datetime64_any_dtype(df_co_vis['Desde']):
+            df_co_vis = df_co_vis.assign(Desde=df_co_vis['Desde'].dt.strftime('%d/%m/%Y'))
+
+    return df_altas, df_altas_vis, df_bajas, df_bajas_vis, df_co, df_co_vis
+
+def _draw_detalle(pdf, titulo, df, max_filas=None):
+    """Tabla de detalle. Con max_filas muestra sólo las primeras filas y resume las demás por Línea."""
+    if max_filas is None or len(df) <= max_filas:
+        pdf.draw_table(titulo, df)
+        return
+    pdf.draw_table(f"{titulo} (primeras {max_filas} de {len(df)})", df.head(max_filas))
+    resto = df.iloc[max_filas:]
+    col = next((c for c in ['Línea', 'Línea Actual'] if c in resto.columns), None)
+    if col is None: return
+    conteo = resto.groupby(col, observed=True).size()
+    resumen = conteo[conteo > 0].rename('Cantidad').to_frame()
+    resumen.index = pd.Index(list(resumen.index), dtype=object, name=col)
+    resumen.loc['Total'] = len(resto)
+    pdf.draw_table(f"{titulo}: {len(resto)} filas más, por {col}", resumen, is_crosstab=True)
+
+def crear_pdf_reporte(titulo_reporte, rango_fechas_str, *args, **kwargs):
+    """PDF del reporte como bytes. Mismos argumentos que escribir_pdf_reporte, sin destino."""
+    salida = io.BytesIO()
+    escribir_pdf_reporte(salida, titulo_reporte, rango_fechas_str, *args, **kwargs)
+    return salida.getvalue()
+
+def escribir_pdf_reporte(destino, titulo_reporte, rango_fechas_str, df_altas, df_bajas, res_altas, res_bajas, res_activos, res_bajas_linea, res_bajas_cat, df_co=None, df_recat=None, df_cambio_linea=None, max_filas_detalle=None):
+    """Escribe el PDF del reporte en destino (archivo binario) a medida que se completan las páginas.
+
+    max_filas_detalle limita las filas de cada sección de detalle; el resto se resume por Línea.
+    """
+    pdf = PDFPorPaginas(destino, orientation='L', unit='mm', format='A4')
+    pdf.report_title = titulo_reporte
+    pdf.add_page()
+    pdf.draw_section_title(f"Indicadores del Período: {rango_fechas_str}")
+    total_act = f"{res_activos.loc['Total', 'Total']:,}".replace(',', '.') if not res_activos.empty else "0"
+    
+    has_co = df_co is not None and not df_co.empty
+    has_recat = df_recat is not None and not df_recat.empty
+    has_linea = df_cambio_linea is not None and not df_cambio_linea.empty
+
+    num_kpis = 3 + (1 if has_co else 0) + (1 if has_recat else 0) + (1 if has_linea else 0)
+    k_w = pdf.page_width / (num_kpis + 0.5)
+    sp = (pdf.page_width - (k_w * num_kpis)) / max(1, (num_kpis - 1))
+    
+    y = pdf.get_y()
+    curr_x = pdf.l_margin
+    
+    pdf.draw_kpi_box("Dotación Activa", total_act, (200, 200, 200), curr_x, y, width=k_w)
+    curr_x += k_w + sp
+    
+    pdf.draw_kpi_box("Altas del Período", '-' if len(df_altas) == 0 else str(len(df_altas)), (200, 200, 200), curr_x, y, width=k_w)
+    curr_x += k_w + sp
+    
+    pdf.draw_kpi_box("Bajas del Período", '-' if len(df_bajas) == 0 else str(len(df_bajas)), (200, 200, 200), curr_x, y, width=k_w)
+    curr_x += k_w + sp
+    
+    if has_co:
+        pdf.draw_kpi_box("Cambio Organizativo", str(len(df_co)), (255, 165, 0), curr_x, y, width=k_w)
+        curr_x += k_w + sp
+        
+    if has_recat:
+        pdf.draw_kpi_box("Cambio Categoría", str(len(df_recat)), COLOR_CELESTE_PASTEL, curr_x, y, width=k_w)
+        curr_x += k_w + sp
+
+    if has_linea:
+        pdf.draw_kpi_box("Cambio Línea", str(len(df_cambio_linea)), COLOR_AZUL_PASTEL_OSCURO, curr_x, y, width=k_w)
+    
+    pdf.ln(22)
+    pdf.draw_table(f"Composición de la Dotación Activa", res_activos, is_crosstab=True)
+    pdf.draw_table(f"Resumen de Bajas (Período: {rango_fechas_str})", res_bajas, is_crosstab=True)
+    pdf.draw_table("Motivos de Baja por Línea", res_bajas_linea, is_crosstab=True)
+    pdf.draw_table("Motivos de Baja por Categoría", res_bajas_cat, is_crosstab=True)
+    pdf.draw_table(f"Resumen de Altas (Período: {rango_fechas_str})", res_altas, is_crosstab=True)
+    
+    if not df_bajas.empty: _draw_detalle(pdf, "Detalle de Bajas", df_bajas[['Nº pers.', 'Apellido', 'Nombre de pila', 'Motivo de Baja', 'Fecha nac.', 'Antigüedad', 'Desde', 'Línea', 'Categoría']], max_filas_detalle)
+    if not df_altas.empty: _draw_detalle(pdf, "Detalle de Altas", df_altas[['Nº pers.', 'Apellido', 'Nombre de pila', 'Fecha nac.', 'Fecha', 'Línea', 'Categoría']], max_filas_detalle)
+    if has_co: _draw_detalle(pdf, "Detalle Cambios Organizativos", df_co[['Nº pers.', 'Apellido', 'Nombre de pila', 'Desde', 'Línea', 'Categoría']], max_filas_detalle)
+    if has_recat: _draw_detalle(pdf, "Detalle Cambios de Categoría", df_recat[['Nº pers.', 'Apellido', 'Nombre de pila', 'Línea', 'Categoría Anterior', 'Categoría Actual']], max_filas_detalle)
+    if has_linea: _draw_detalle(pdf, "Detalle Cambios de Línea", df_cambio_linea[['Nº pers.', 'Apellido', 'Nombre de pila', 'Categoría', 'Línea Anterior', 'Línea Actual']], max_filas_detalle)
+    
+    pdf.close()
+
+def escribir_pdf_tendencia(destino, titulo_reporte, rango_fechas_str, df_tendencia, granularidad):
+    """Escribe en destino el PDF de calcular_tendencia: indicadores, gráficos y la tabla por período."""
+    pdf = PDFPorPaginas(destino, orientation='L', unit='mm', format='A4')
+    pdf.report_title = titulo_reporte
+    pdf.add_page()
+    pdf.draw_section_title(f"Indicadores del Período: {rango_fechas_str}")
+    formato = lambda n: f"{n:,.0f}".replace(',', '.')
+    if not df_tendencia.empty:
+        inicial = df_tendencia['Dotación activa'].iloc[0] - df_tendencia['Variación neta'].iloc[0]
+        kpis = [
+            ("Dotación Inicial", formato(inicial), (200, 200, 200)),
+            ("Dotación Final", formato(df_tendencia['Dotación activa'].iloc[-1]), (200, 200, 200)),
+            ("Altas del Período", formato(df_tendencia['Altas'].sum()), COLOR_VERDE_ALTAS),
+            ("Bajas del Período", formato(df_tendencia['Bajas'].sum()), COLOR_ROJO_BAJAS),
+            ("Variación Neta", formato(df_tendencia['Variación neta'].sum()), COLOR_AZUL_INSTITUCIONAL),
+        ]
+        k_w = pdf.page_width / (len(kpis) + 0.5)
+        sp = (pdf.page_width - k_w * len(kpis)) / (len(kpis) - 1)
+        y = pdf.get_y()
+        for i, (titulo, valor, color) in enumerate(kpis): pdf.draw_kpi_box(titulo, valor, color, pdf.l_margin + i * (k_w + sp), y, width=k_w)
+        pdf.ln(22)
+
+        etiquetas = df_tendencia['Desde'].dt.strftime('%d/%m/%y' if granularidad != 'Mes' else '%m/%Y').tolist()
+        pdf.draw_line_chart("Dotación Activa", etiquetas, {'Dotación activa': (df_tendencia['Dotación activa'].tolist(), COLOR_AZUL_INSTITUCIONAL)})
+        pdf.draw_line_chart(f"Altas y Bajas por {granularidad}", etiquetas, {
+            'Altas': (df_tendencia['Altas'].tolist(), COLOR_VERDE_ALTAS),
+            'Bajas': (df_tendencia['Bajas'].tolist(), COLOR_ROJO_BAJAS),
+        })
+        pdf.draw_table(f"Detalle por {granularidad}", df_tendencia.assign(
+            Desde=df_tendencia['Desde'].dt.strftime('%d/%m/%Y'),
+            Hasta=df_tendencia['Hasta'].dt.strftime('%d/%m/%Y'),
+            **{c: df_tendencia[c].fillna(0) for c in ['Antigüedad Prom.', 'Edad Prom.']},
+        ))
+    pdf.close()
+
+
+# --- 4. REPORTES ---
+TIPOS_REPORTE = ['Diario', 'Semanal', 'Mensual', 'Anual']
+
+def rango_por_defecto(report_type, today):
+    """Rango de fechas que se propone para cada tipo de reporte."""
+    if report_type == 'Diario':
+        return today, today
+    if report_type == 'Semanal':
+        return today - timedelta(days=7), today
+    if report_type == 'Mensual':
+        d_s = today.replace(day=1)
+        return d_s, (d_s + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return today.replace(month=1, day=1), today.replace(month=12, day=31)
+
+def titulo_reporte(report_type):
+    return "Resumen Diario de Dotación" if report_type == 'Diario' else f"Reporte {report_type} de Dotación"
+
+def nombre_archivo_reporte(report_type, start, end):
+    if report_type == 'Diario':
+        return f"Reporte_Diario_Dotacion_{end.strftime('%Y%m%d')}.pdf"
+    if report_type == 'Anual':
+        return f"Reporte_Anual_{start.strftime('%Y')}.pdf"
+    return f"Reporte_{report_type}_{start.strftime('%Y%m%d')}_a_{end.strftime('%Y%m%d')}.pdf"
+
+def _resumenes(celdas_activos, celdas_altas, celdas_bajas):
+    with etapa('resúmenes') as r:
+        r['filas'] = len(celdas_activos) + len(celdas_altas) + len(celdas_bajas)
+        return {
+            'res_activos': generar_resumen_desde_celdas(celdas_activos),
+            'res_altas': generar_resumen_desde_celdas(celdas_altas, incluir_promedios=False),
+            'res_bajas': generar_resumen_desde_celdas(celdas_bajas),
+            'res_bajas_linea': generar_resumen_desde_celdas(celdas_bajas, 'Motivo de Baja', 'Línea', incluir_promedios=False),
+            'res_bajas_cat': generar_resumen_desde_celdas(celdas_bajas, 'Motivo de Baja', 'Categoría', incluir_promedios=False),
+        }
+
+def _metricas(df_altas_raw, df_bajas_raw, df_co_raw, fecha_ref):
+    with etapa('métricas') as r:
+        r['filas'] = len(df_altas_raw) + len(df_bajas_raw) + len(df_co_raw)
+        return procesar_metricas_novedades(df_altas_raw, df_bajas_raw, df_co_raw, fecha_ref)
+
+def calcular_reporte_diario(libro, hoy):
+    """Tablas del reporte diario: novedades respecto a la foto de Activos. Devuelve los argumentos de crear_pdf_reporte."""
+    df_act_p, dif = libro.activos, libro.diferencias
+    df_co_raw = dif.co if not libro.co.empty else df_act_p[df_act_p[CLAVE_LEGAJO].isin(dif.desaparecidos)]
+
+    df_alt_r = dif.altas
+    df_baj_r = dif.bajas
+    if not df_baj_r.empty:
+        df_baj_r = df_baj_r.assign(Desde=df_baj_r['Desde'] - pd.Timedelta(days=1)).sort_values(by='Desde', ascending=True)
+    if not df_alt_r.empty: df_alt_r = df_alt_r.sort_values(by='Fecha', ascending=True)
+
+    df_a, df_a_v, df_b, df_b_v, df_c, df_c_v = _metricas(df_alt_r, df_baj_r, df_co_raw, hoy)
+    resumenes = _resumenes(celdas_activos_a_fecha(libro.cubo, hoy), celdas_de_filas(df_a), celdas_de_filas(df_b))
+
+    return dict(
+        df_altas=df_a_v, df_bajas=df_b_v, **resumenes,
+        df_co=df_c_v, df_recat=dif.cambios['Categoría'], df_cambio_linea=dif.cambios['Línea'],
+    )
+
+def calcular_reporte_periodo(libro, report_type, start, end, foto=None):
+    """Tablas de un reporte Semanal/Mensual/Anual entre start y end. Devuelve los argumentos de crear_pdf_reporte.
+
+    Con foto (FotoActivos del historial) los activos salen de esa foto en lugar de aproximarse
+    con los de BaseQuery ingresados hasta end, que no incluyen a quienes se fueron después.
+    """
+    start, end = pd.to_datetime(start), pd.to_datetime(end)
+    df_alt_raw, df_baj_raw, df_co_f = filtrar_novedades_por_fecha(libro.eventos, start, end)
+    celdas_altas = sumar_celdas(libro.cubo.altas, ['Línea', 'Categoría'], start, end)
+
+    if report_type == 'Anual' and not df_alt_raw.empty:
+        df_alt_raw = df_alt_raw.assign(**{'Categoría': 'ASP.AY.C'})
+        celdas_altas = celdas_altas.assign(**{'Categoría': 'ASP.AY.C'})
+
+    df_a, df_a_v, df_b, df_b_v, df_c, df_c_v = _metricas(df_alt_raw, df_baj_raw, df_co_f, end)
+    if foto is not None: celdas_activos = celdas_de_filas(agregar_antiguedad_edad(foto.activos, end))
+    else: celdas_activos = celdas_activos_a_fecha(libro.cubo, end, hasta_ingreso=end)
+    resumenes = _resumenes(
+        celdas_activos, celdas_altas,
+        sumar_celdas(libro.cubo.bajas, CLAVES_CUBO, start, end),
+    )
+
+    return dict(
+        df_altas=df_a_v, df_bajas=df_b_v, **resumenes,
+        df_co=df_c_v, df_recat=libro.diferencias.cambios['Categoría'], df_cambio_linea=libro.diferencias.cambios['Línea'],
+    )
+
+GRANULARIDADES = {'Día': 'D', 'Semana': 'W-MON', 'Mes': 'MS'}
+
+def _inicios_periodos(inicio, fin, granularidad):
+    """Inicio de cada período (día, semana de lunes a domingo o mes) entre inicio y fin; el primero es inicio."""
+    inicios = pd.date_range(inicio, fin, freq=GRANULARIDADES[granularidad])
+    return inicios if len(inicios) and inicios[0] == inicio else inicios.insert(0, inicio)
+
+def _eventos_hasta(eventos, fecha_fin):
+    """Filas de eventos con fecha <= fecha_fin y sus fechas, en orden (sin las fechas vacías)."""
+    if eventos.df.empty: return eventos.df, eventos.fechas
+    hasta = eventos.fechas.searchsorted(np.datetime64(fecha_fin), side='right')
+    return eventos.df.take(eventos.orden[:hasta]), eventos.fechas[:hasta]
+
+def _movimientos(df, fechas, inicios, altas=0, bajas=0, signo=0):
+    """Aporte de cada fila al período que contiene su fecha: conteos y, con signo, legajos y días de Fecha y Fecha nac."""
+    dias_nac = _dias_desde_epoca(df['Fecha nac.']).to_numpy()
+    return pd.DataFrame({
+        # -1: antes de inicio, sólo cuenta para la dotación inicial
+        'periodo': inicios.searchsorted(fechas, side='right') - 1,
+        'altas': altas, 'bajas': bajas, 'n': signo,
+        'dias_fecha': signo * _dias_desde_epoca(df['Fecha']).to_numpy(),
+        'n_nac': signo * ~np.isnan(dias_nac), 'dias_nac': signo * np.nan_to_num(dias_nac),
+    })
+
+def calcular_tendencia(libro, inicio, fin, granularidad='Mes'):
+    """Altas, bajas, variación neta, dotación activa y antigüedad/edad promedio por período entre inicio y fin.
+
+    Cada alta suma y cada baja resta un legajo (con sus días de Fecha y Fecha nac.) en la fecha del evento:
+    un solo groupby por período más una suma acumulada, así que el costo no depende de cuántos períodos
+    haya. La dotación al cierre de cada período es la de ingresados hasta entonces menos dados de baja
+    hasta entonces, y la antigüedad y la edad promedio se calculan a esa fecha de cierre.
+    """
+    inicio, fin = pd.Timestamp(inicio).normalize(), pd.Timestamp(fin).normalize()
+    if inicio > fin: raise ValueError("El inicio de la tendencia es posterior al fin.")
+    inicios = _inicios_periodos(inicio, fin, granularidad)
+    with etapa('tendencia', granularidad=granularidad, periodos=len(inicios)) as r:
+        altas, f_altas = _eventos_hasta(libro.eventos.altas, fin)
+        bajas, f_bajas = _eventos_hasta(libro.eventos.bajas, fin)
+        partes = []
+        if not altas.empty: partes.append(_movimientos(altas, f_altas, inicios, altas=1, signo=1))
+        if not bajas.empty:
+            # La baja cuenta en el período de su Desde, como en los reportes, pero no saca de la dotación a
+            # nadie antes de su ingreso; sin Fecha de ingreso nunca sumó como alta, así que tampoco resta
+            partes.append(_movimientos(bajas, f_bajas, inicios, bajas=1))
+            efectiva = np.maximum(f_bajas, bajas['Fecha'].to_numpy())
+            resta = bajas['Fecha'].notna().to_numpy() & (efectiva <= np.datetime64(fin))
+            partes.append(_movimientos(bajas[resta], efectiva[resta], inicios, signo=-1))
+        eventos = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=['periodo', 'altas', 'bajas', 'n', 'dias_fecha', 'n_nac', 'dias_nac'], dtype='int64')
+        por_periodo = eventos.groupby('periodo').sum().reindex(range(-1, len(inicios)), fill_value=0)
+        acumulado = por_periodo.cumsum().iloc[1:]
+        por_periodo = por_periodo.iloc[1:]
+        r['filas'] = len(eventos)
+
+    hasta = pd.DatetimeIndex(inicios[1:] - pd.Timedelta(days=1)).append(pd.DatetimeIndex([fin]))
+    ref = (hasta - EPOCA).days.to_numpy()
+    n, n_nac = acumulado['n'].to_numpy(), acumulado['n_nac'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        antiguedad = (n * ref - acumulado['dias_fecha'].to_numpy()) / n / 365.25
+        # Sin Fecha nac. cuenta como edad 0, igual que en el cubo y en calcular_años
+        edad = (n_nac * ref - acumulado['dias_nac'].to_numpy()) / n / 365.25
+    return pd.DataFrame({
+        'Desde': inicios, 'Hasta': hasta,
+        'Altas': por_periodo['altas'].to_numpy(), 'Bajas': por_periodo['bajas'].to_numpy(),
+        'Variación neta': por_periodo['n'].to_numpy(), 'Dotación activa': n,
+        'Antigüedad Prom.': np.where(n > 0, antiguedad, np.nan), 'Edad Prom.': np.where(n > 0, edad, np.nan),
+    })
+
+def titulo_tendencia(granularidad):
+    return f"Tendencia de Dotación por {granularidad}"
+
+def nombre_archivo_tendencia(granularidad, inicio, fin):
+    return f"Tendencia_{granularidad.replace('í', 'i')}_{inicio.strftime('%Y%m%d')}_a_{fin.strftime('%Y%m%d')}.pdf"
+
+def generar_pdf_tendencia(libro, inicio, fin, granularidad='Mes', destino=None):
+    """PDF de calcular_tendencia, escrito en destino o devuelto como bytes si no se pasa."""
+    df_tendencia = calcular_tendencia(libro, inicio, fin, granularidad)
+    salida = io.BytesIO() if destino is None else destino
+    with etapa('pdf') as r:
+        escribir_pdf_tendencia(salida, titulo_tendencia(granularidad), f"{inicio.strftime('%d/%m/%Y')} - {fin.strftime('%d/%m/%Y')}", df_tendencia, granularidad)
+        r['filas'] = len(df_tendencia)
+        r['bytes'] = salida.tell()
+    return salida.getvalue() if destino is None else None
+
+def generar_pdf_reporte(libro, report_type, start, end, datos=None, foto=None, destino=None, max_filas_detalle=None):
+    """PDF completo de un reporte, escrito en destino (archivo binario) o devuelto como bytes si no se pasa.
+
+    datos permite reutilizar lo ya calculado con calcular_reporte_*.
+    """
+    if datos is None:
+        datos = calcular_reporte_diario(libro, end) if report_type == 'Diario' else calcular_reporte_periodo(libro, report_type, start, end, foto)
+    rango = end.strftime('%d/%m/%Y') if report_type == 'Diario' else f"{start.strftime('%d/%m/%Y')} - {end.strftime('%d/%m/%Y')}"
+    salida = io.BytesIO() if destino is None else destino
+    with etapa('pdf') as r:
+        escribir_pdf_reporte(salida, titulo_reporte(report_type), rango, **datos, max_filas_detalle=max_filas_detalle)
+        r['filas'] = sum(len(df) for df in datos.values() if df is not None)
+        r['bytes'] = salida.tell()
+    return salida.getvalue() if destino is None else None
+
+_dir_pdfs = None
+
+def _directorio_pdfs():
+    """Carpeta temporal del proceso para los PDF de la caché; se borra al salir."""
+    global _dir_pdfs
+    with _LOCK_DIR_PDFS:
+        if _dir_pdfs is None:
+            _dir_pdfs = tempfile.mkdtemp(prefix='dotacion_pdfs_')
+            atexit.register(shutil.rmtree, _dir_pdfs, ignore_errors=True)
+    return _dir_pdfs
+
+def _borrar_archivo(ruta):
+    try: os.remove(ruta)
+    except FileNotFoundError: pass
+
+_LOCK_DIR_PDFS = threading.Lock()
+_CACHE_PDFS = CacheLRU(MAX_PDFS_EN_CACHE, al_descartar=_borrar_archivo)
+
+def _clave_pdf(libro, report_type, start, end, foto=None, max_filas_detalle=None):
+    # Las fotos del historial no se reescriben: su fecha alcanza para identificarlas
+    return libro.hash_archivo, report_type, pd.Timestamp(start), pd.Timestamp(end), foto.fecha if foto is not None else None, max_filas_detalle
+
+def _pdf_en_cache(clave):
+    ruta = _CACHE_PDFS.get(clave)
+    return ruta if ruta is not None and os.path.exists(ruta) else None
+
+def _pdf_a_disco(clave, escribir):
+    """Ruta del PDF de clave; si no está en la caché lo genera con escribir(archivo) en la carpeta temporal."""
+    ruta = _pdf_en_cache(clave)
+    if ruta is None:
+        fd, ruta = tempfile.mkstemp(suffix='.pdf', dir=_directorio_pdfs())
+        try:
+            with os.fdopen(fd, 'wb') as f: escribir(f)
+        except BaseException:
+            _borrar_archivo(ruta)
+            raise
+        # Otra sesión pudo generar el mismo PDF en paralelo: queda el primero guardado y se borra este
+        guardada = _CACHE_PDFS.setdefault(clave, ruta, vigente=os.path.exists)
+        if guardada != ruta: _borrar_archivo(ruta)
+        ruta = guardada
+    return ruta
+
+def pdf_reporte_en_cache(libro, report_type, start, end, foto=None, max_filas_detalle=None):
+    """Ruta del PDF ya generado para (archivo, tipo, inicio, fin, foto, filas de detalle), o None si todavía no se pidió."""
+    return _pdf_en_cache(_clave_pdf(libro, report_type, start, end, foto, max_filas_detalle))
+
+def obtener_pdf_reporte(libro, report_type, start, end, foto=None, max_filas_detalle=None):
+    """Ruta del PDF del reporte, generado directo a disco una sola vez por combinación y guardado en la caché.
+
+    Los archivos viven en una carpeta temporal y se borran cuando salen de la caché.
+    """
+    return _pdf_a_disco(
+        _clave_pdf(libro, report_type, start, end, foto, max_filas_detalle),
+        lambda f: generar_pdf_reporte(libro, report_type, start, end, foto=foto, destino=f, max_filas_detalle=max_filas_detalle),
+    )
+
+def _clave_tendencia(libro, inicio, fin, granularidad):
+    return libro.hash_archivo, 'Tendencia', pd.Timestamp(inicio), pd.Timestamp(fin), granularidad
+
+def pdf_tendencia_en_cache(libro, inicio, fin, granularidad):
+    """Ruta del PDF de tendencia ya generado, o None."""
+    return _pdf_en_cache(_clave_tendencia(libro, inicio, fin, granularidad))
+
+def obtener_pdf_tendencia(libro, inicio, fin, granularidad):
+    """Ruta del PDF de tendencia, generado una sola vez por combinación como obtener_pdf_reporte."""
+    return _pdf_a_disco(
+        _clave_tendencia(libro, inicio, fin, granularidad),
+        lambda f: generar_pdf_tendencia(libro, inicio, fin, granularidad, destino=f),
+    )
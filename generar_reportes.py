@@ -0,0 +1,116 @@
+"""Generación de reportes PDF de dotación sin Streamlit, pensada para correr desde cron.
+
+Cada período es un tipo de reporte (diario, semanal, mensual, anual), opcionalmente con su rango:
+
+    python generar_reportes.py Dotacion.xlsx diario semanal mensual anual
+    python generar_reportes.py Dotacion.xlsx mensual:2025-05-01:2025-05-31 --salida reportes/
+    python generar_reportes.py exports/ anual --procesos 4
+
+En lugar de un Excel se puede pasar una carpeta con un Excel por Línea (o --archivo varias veces): se
+leen en paralelo y se consolidan en una sola base.
+
+El Excel se lee una sola vez y se comparte con los procesos que generan los PDF en paralelo; cada
+proceso escribe su PDF directo al archivo de salida, página por página.
+Con --max-filas-detalle cada sección de detalle muestra hasta esa cantidad de filas y resume el resto por Línea.
+Con --perfil se escribe en stderr una línea JSON por etapa (tiempo, filas y memoria pico).
+Con --historial la carga se registra en el historial de fotos (con la fecha de --fecha, por defecto hoy)
+y los reportes que terminan antes de hoy toman los activos de la foto registrada a esa fecha.
+"""
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from contextlib import nullcontext
+
+from dotacion import TIPOS_REPORTE, activar_copy_on_write, cargar_libro, generar_pdf_reporte, nombre_archivo_reporte, perfilar, rango_por_defecto
+from historial import HistorialDotacion
+
+activar_copy_on_write()
+
+_libro = None
+_perfil = False
+_max_filas_detalle = None
+
+def configurar_log_perfil():
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stderr)
+
+def medicion(activa, **contexto):
+    return perfilar(memoria=True, registrar_log=True, **contexto) if activa else nullcontext()
+
+def _iniciar_proceso(libro, perfil=False, max_filas_detalle=None):
+    global _libro, _perfil, _max_filas_detalle
+    _libro, _perfil, _max_filas_detalle = libro, perfil, max_filas_detalle
+    if perfil: configurar_log_perfil()
+
+def _generar(periodo):
+    report_type, start, end, foto, ruta = periodo
+    with medicion(_perfil, reporte=report_type), open(ruta, 'wb') as f:
+        generar_pdf_reporte(_libro, report_type, start, end, foto=foto, destino=f, max_filas_detalle=_max_filas_detalle)
+    return ruta
+
+def generar_pdfs(libro, periodos, procesos, perfil=False, max_filas_detalle=None):
+    """Escribe el PDF de cada (tipo, inicio, fin, foto, ruta) repartidos en un pool de procesos; devuelve las rutas en orden."""
+    if procesos <= 1:
+        _iniciar_proceso(libro, perfil, max_filas_detalle)
+        yield from map(_generar, periodos)
+        return
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso, initargs=(libro, perfil, max_filas_detalle)) as pool:
+        yield from pool.map(_generar, periodos)
+
+def parsear_periodo(texto, hoy):
+    """'mensual' -> rango por defecto; 'mensual:2025-05-01:2025-05-31' -> rango explícito."""
+    partes = texto.split(':')
+    report_type = partes[0].capitalize()
+    if report_type not in TIPOS_REPORTE or len(partes) not in (1, 3):
+        raise argparse.ArgumentTypeError(f"Período inválido: '{texto}'. Usar tipo o tipo:AAAA-MM-DD:AAAA-MM-DD con tipo en {', '.join(t.lower() for t in TIPOS_REPORTE)}.")
+    if len(partes) == 1:
+        start, end = rango_por_defecto(report_type, hoy)
+    else:
+        start, end = pd.to_datetime(partes[1]), pd.to_datetime(partes[2])
+        if start > end: raise argparse.ArgumentTypeError(f"Período inválido: '{texto}'. El inicio es posterior al fin.")
+    return report_type, start, end
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera reportes PDF de dotación a partir del Excel de BaseQuery.")
+    parser.add_argument('archivo', help="Excel con las hojas BaseQuery, Activos y (opcional) CO, o carpeta con varios")
+    parser.add_argument('periodos', nargs='+', help="diario, semanal, mensual, anual o tipo:AAAA-MM-DD:AAAA-MM-DD")
+    parser.add_argument('--archivo', dest='otros', action='append', default=[], metavar='EXCEL', help="otro Excel a consolidar con el primero (repetible)")
+    parser.add_argument('--salida', default='.', help="carpeta donde se escriben los PDF (default: actual)")
+    parser.add_argument('--procesos', type=int, default=os.cpu_count(), help="procesos en paralelo (default: núcleos disponibles)")
+    parser.add_argument('--historial', help="archivo SQLite del historial de fotos donde registrar esta carga")
+    parser.add_argument('--fecha', type=pd.Timestamp, help="fecha en que se exportó el Excel, para el historial (default: hoy)")
+    parser.add_argument('--max-filas-detalle', type=int, help="filas por sección de detalle; el resto se resume por Línea (default: todas)")
+    parser.add_argument('--perfil', action='store_true', help="registra en stderr tiempo, filas y memoria de cada etapa")
+    args = parser.parse_args(argv)
+
+    hoy = pd.Timestamp.now().normalize()
+    try:
+        periodos = [parsear_periodo(p, hoy) for p in args.periodos]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    if args.perfil: configurar_log_perfil()
+    archivos = [args.archivo, *args.otros] if args.otros else args.archivo
+    with medicion(args.perfil):
+        libro = cargar_libro(archivos, args.procesos)
+    if libro.base.empty: parser.error(f"'{args.archivo}' no tiene una hoja BaseQuery con datos.")
+    os.makedirs(args.salida, exist_ok=True)
+
+    historial = HistorialDotacion(args.historial) if args.historial else None
+    if historial is not None:
+        try: historial.registrar_libro(libro, args.fecha if args.fecha is not None else hoy)
+        except ValueError as e: print(f"Aviso: no se guardó en el historial: {e}", file=sys.stderr)
+    periodos = [
+        (t, s, e, historial.foto_a_fecha(e) if historial is not None and e < hoy else None, os.path.join(args.salida, nombre_archivo_reporte(t, s, e)))
+        for t, s, e in periodos
+    ]
+
+    procesos = min(args.procesos or 1, len(periodos))
+    for ruta in generar_pdfs(libro, periodos, procesos, args.perfil, args.max_filas_detalle): print(ruta)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Historial de fotos de activos en SQLite, para consultar la dotación a cualquier fecha ya registrada.
+
+Cada carga del Excel registra hasta dos fotos: la hoja Activos (activos del día anterior) y los activos
+de BaseQuery a la fecha de carga. De cada foto sólo se guardan los legajos que cambiaron respecto a la
+foto anterior (ingresos, salidas o datos distintos), así que el archivo crece con las novedades y no con
+la dotación, y registrar un día nuevo nunca reescribe lo ya guardado.
+"""
+import sqlite3
+from contextlib import closing
+from functools import partial
+
+import pandas as pd
+
+from dotacion import (
+    CLAVE_LEGAJO, COLUMNAS_FECHA, FotoActivos, agregar_antiguedad_edad, comparar_fotos,
+    generar_resumen_completo, normalizar_hoja,
+)
+
+RUTA_HISTORIAL = 'historial_dotacion.sqlite'
+COLUMNAS_HISTORIAL = {
+    'Apellido': 'apellido', 'Nombre de pila': 'nombre', 'Categoría': 'categoria', 'Línea': 'linea',
+    'Fecha': 'fecha_ingreso', 'Fecha nac.': 'fecha_nac',
+}
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS fotos (
+    fecha TEXT PRIMARY KEY,         -- AAAA-MM-DD
+    hoja TEXT NOT NULL,             -- BaseQuery o Activos
+    hash_archivo TEXT NOT NULL,
+    activos INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS novedades (
+    legajo TEXT NOT NULL,
+    fecha TEXT NOT NULL,            -- foto desde la que vale la fila
+    activo INTEGER NOT NULL,        -- 0: desde esa foto ya no figura como activo
+    apellido TEXT, nombre TEXT, categoria TEXT, linea TEXT, fecha_ingreso TEXT, fecha_nac TEXT,
+    PRIMARY KEY (legajo, fecha)
+) WITHOUT ROWID;
+"""
+# Última fila de cada legajo hasta una fecha; si está activo, así figuraba en esa foto
+SQL_ACTIVOS_A_FECHA = f"""
+SELECT n.legajo, {', '.join('n.' + c for c in COLUMNAS_HISTORIAL.values())}
+FROM novedades n JOIN (
+    SELECT legajo, MAX(fecha) AS fecha FROM novedades WHERE fecha <= ? GROUP BY legajo
+) u ON n.legajo = u.legajo AND n.fecha = u.fecha
+WHERE n.activo = 1
+"""
+
+def _fecha(fecha):
+    return pd.Timestamp(fecha).strftime('%Y-%m-%d')
+
+def _a_filas(df):
+    """Activos de una hoja como filas del historial: texto o None, indexadas por legajo."""
+    df = df.dropna(subset=[CLAVE_LEGAJO]).drop_duplicates(CLAVE_LEGAJO)
+    filas = pd.DataFrame(index=pd.Index(df[CLAVE_LEGAJO].astype(str).to_numpy(), name='legajo'))
+    for col, col_sql in COLUMNAS_HISTORIAL.items():
+        if col not in df.columns:
+            filas[col_sql] = None
+            continue
+        valores = df[col].dt.strftime('%Y-%m-%d') if col in COLUMNAS_FECHA else df[col].astype(object)
+        filas[col_sql] = [v if pd.notna(v) else None for v in valores]
+    return filas
+
+def _a_dataframe(filas):
+    """Inverso de _a_filas: hoja de activos normalizada como las del Excel, con Nº pers. = legajo."""
+    df = filas.rename(columns={v: k for k, v in COLUMNAS_HISTORIAL.items()}).reset_index()
+    df.insert(0, 'Nº pers.', df['legajo'])
+    df = df.rename(columns={'legajo': CLAVE_LEGAJO}).assign(**{'Status ocupación': 'Activo'})
+    return normalizar_hoja(df)
+
+def _novedades(anterior, actual):
+    """Legajos de actual nuevos o con datos distintos a anterior, y legajos de anterior que ya no están."""
+    comunes = actual.index.intersection(anterior.index)
+    a, b = actual.loc[comunes], anterior.loc[comunes, actual.columns]
+    distinto = ((a != b) & ~(a.isna() & b.isna())).any(axis=1).to_numpy()
+    return actual.loc[actual.index.difference(anterior.index).append(comunes[distinto])], anterior.index.difference(actual.index)
+
+class HistorialDotacion:
+    """Fotos de activos por fecha en un archivo SQLite. Sólo admite fotos posteriores a la última registrada."""
+    def __init__(self, ruta=RUTA_HISTORIAL):
+        self.ruta = ruta
+        with self._conectar() as con: con.executescript(ESQUEMA)
+
+    def _conectar(self):
+        # Una conexión por operación: Streamlit atiende cada sesión en su propio hilo
+        return closing(sqlite3.connect(self.ruta))
+
+    def fotos(self):
+        """Fotos registradas, de la más vieja a la más nueva."""
+        with self._conectar() as con:
+            return pd.read_sql_query('SELECT * FROM fotos ORDER BY fecha', con, parse_dates=['fecha'])
+
+    def registrar_libro(self, libro, fecha):
+        """Registra la foto de Activos (al día anterior) y la de los activos de BaseQuery a fecha.
+
+        Devuelve las fechas agregadas. Volver a registrar el mismo archivo no hace nada; otro archivo con
+        fecha ya registrada o anterior a la última foto da ValueError, porque reescribiría el historial.
+        """
+        if libro.base.empty: return []
+        fecha = pd.Timestamp(fecha).normalize()
+        f_base, f_prev = _fecha(fecha), _fecha(fecha - pd.Timedelta(days=1))
+        with self._conectar() as con, con:
+            ultima = con.execute('SELECT MAX(fecha) FROM fotos').fetchone()[0]
+            if ultima is not None and f_base <= ultima:
+                guardada = con.execute('SELECT hash_archivo FROM fotos WHERE fecha = ?', (f_base,)).fetchone()
+                if guardada is not None and guardada[0] == libro.hash_archivo: return []
+                raise ValueError(f"El historial ya tiene fotos hasta el {ultima}; no se puede registrar otra al {f_base}.")
+            registradas = []
+            if CLAVE_LEGAJO in libro.activos.columns and (ultima is None or f_prev > ultima):
+                self._registrar(con, f_prev, 'Activos', libro.hash_archivo, libro.activos)
+                registradas.append(f_prev)
+            self._registrar(con, f_base, 'BaseQuery', libro.hash_archivo, libro.base[libro.base['Status ocupación'] == 'Activo'])
+            return registradas + [f_base]
+
+    def _registrar(self, con, fecha, hoja, hash_archivo, df_activos):
+        actual = _a_filas(df_activos)
+        ultima = con.execute('SELECT MAX(fecha) FROM fotos').fetchone()[0]
+        anterior = self._filas_a_fecha(con, ultima) if ultima is not None else actual.iloc[:0]
+        cambiados, idos = _novedades(anterior, actual)
+        columnas = ', '.join(COLUMNAS_HISTORIAL.values())
+        marcas = ', '.join('?' * len(COLUMNAS_HISTORIAL))
+        con.executemany(
+            f'INSERT INTO novedades (legajo, fecha, activo, {columnas}) VALUES (?, ?, 1, {marcas})',
+            ((legajo, fecha, *valores) for legajo, *valores in cambiados.itertuples(name=None)),
+        )
+        con.executemany('INSERT INTO novedades (legajo, fecha, activo) VALUES (?, ?, 0)', ((legajo, fecha) for legajo in idos))
+        con.execute('INSERT INTO fotos VALUES (?, ?, ?, ?)', (fecha, hoja, hash_archivo, len(actual)))
+
+    def _filas_a_fecha(self, con, fecha):
+        return pd.read_sql_query(SQL_ACTIVOS_A_FECHA, con, params=(fecha,), index_col='legajo')
+
+    def fecha_foto(self, fecha):
+        """Fecha de la última foto registrada hasta fecha, o None si no hay ninguna."""
+        with self._conectar() as con:
+            fecha_foto = con.execute('SELECT MAX(fecha) FROM fotos WHERE fecha <= ?', (_fecha(fecha),)).fetchone()[0]
+        return pd.Timestamp(fecha_foto) if fecha_foto is not None else None
+
+    def _activos_de_foto(self, fecha_foto):
+        with self._conectar() as con: filas = self._filas_a_fecha(con, _fecha(fecha_foto))
+        return _a_dataframe(filas)
+
+    def foto_a_fecha(self, fecha):
+        """FotoActivos de la última foto registrada hasta fecha, o None si no hay ninguna.
+
+        Sólo consulta la fecha: los activos se leen al usarlos (p. ej. al generar el PDF).
+        """
+        fecha_foto = self.fecha_foto(fecha)
+        if fecha_foto is None: return None
+        return FotoActivos(fecha_foto, cargar=partial(self._activos_de_foto, fecha_foto))
+
+    def dotacion_a_fecha(self, fecha):
+        """Resumen Categoría x Línea de los activos a fecha, con antigüedad y edad promedio a esa fecha."""
+        foto = self.foto_a_fecha(fecha)
+        if foto is None or foto.activos.empty: return pd.DataFrame()
+        return generar_resumen_completo(agregar_antiguedad_edad(foto.activos, pd.Timestamp(fecha)))
+
+    def cambios_entre(self, fecha_inicio, fecha_fin):
+        """DiferenciasFoto entre las fotos vigentes a fecha_inicio y a fecha_fin.
+
+        altas: activos al fin que no estaban al inicio; bajas: activos al inicio que ya no están al fin
+        (con sus datos de entonces); cambios: Categoría y Línea de quienes siguen.
+        """
+        vacia = FotoActivos(None, _a_dataframe(pd.DataFrame(columns=list(COLUMNAS_HISTORIAL.values()), index=pd.Index([], name='legajo'))))
+        inicio = self.foto_a_fecha(fecha_inicio) or vacia
+        fin = self.foto_a_fecha(fecha_fin) or vacia
+        idos = inicio.activos[~inicio.activos[CLAVE_LEGAJO].isin(fin.activos[CLAVE_LEGAJO])]
+        base = pd.concat([fin.activos, idos.assign(**{'Status ocupación': 'Dado de baja'})], ignore_index=True)
+        return comparar_fotos(base, inicio.activos)